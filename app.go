@@ -3,7 +3,9 @@ package main
 import (
 	"context"
 	"encoding/json"
+	"bufio"
 	"fmt"
+	"net"
 	"os"
 	"os/exec"
 	"path/filepath"
@@ -626,9 +628,49 @@ func (a *App) LoadProject(projectID string) (*ProjectConfig, error) {
         return nil, fmt.Errorf("failed to parse project config: %w", err)
     }
     
+    applyStepLog(projectDir, &project)
+    
     return &project, nil
 }
 
+// applyStepLog folds in step records the Python pipeline has appended to
+// project.log.jsonl but not yet snapshotted into project.json
+func applyStepLog(projectDir string, project *ProjectConfig) {
+    f, err := os.Open(filepath.Join(projectDir, "project.log.jsonl"))
+    if err != nil {
+        return
+    }
+    defer f.Close()
+    
+    scanner := bufio.NewScanner(f)
+    for scanner.Scan() {
+        var record struct {
+            Step      string `json:"step"`
+            Completed bool   `json:"completed"`
+            Ts        string `json:"ts"`
+        }
+        if err := json.Unmarshal(scanner.Bytes(), &record); err != nil {
+            continue // Torn final line from a crash mid-append
+        }
+        
+        switch record.Step {
+        case "download":
+            project.CompletedSteps.Download = record.Completed
+        case "transcribe":
+            project.CompletedSteps.Transcribe = record.Completed
+        case "translate":
+            project.CompletedSteps.Translate = record.Completed
+        case "synthesize":
+            project.CompletedSteps.Synthesize = record.Completed
+        case "combine":
+            project.CompletedSteps.Combine = record.Completed
+        default:
+            continue
+        }
+        project.LastModified = record.Ts
+    }
+}
+
 // UpdateProject updates an existing project configuration
 func (a *App) UpdateProject(project *ProjectConfig) error {
     projectDir, err := a.findProjectDirectory(project.ID)
@@ -754,6 +796,12 @@ func (a *App) saveProjectConfig(projectDir string, project *ProjectConfig) error
         return fmt.Errorf("failed to marshal project config: %w", err)
     }
     
+    // This config supersedes any step records the Python pipeline logged but never snapshotted;
+    // left in place, LoadProject would replay them over it
+    if err := os.Remove(filepath.Join(projectDir, "project.log.jsonl")); err != nil && !os.IsNotExist(err) {
+        return fmt.Errorf("failed to remove project step log: %w", err)
+    }
+    
     return os.WriteFile(configPath, data, 0644)
 }
 
@@ -995,6 +1043,31 @@ func (a *App) RunPipelineStep(projectID string, step string) (map[string]interfa
         return nil, fmt.Errorf("project not found: %w", err)
     }
     
+    // Prefer a running pipeline server, which skips interpreter startup and imports
+    if result, ok := a.runPipelineStepOnSocket(projectDir, step); ok {
+        return result, nil
+    }
+    
+    // Prepare command
+    cmd := a.pipelineCommand(projectDir, step)
+    
+    // Execute command and capture output
+    output, err := cmd.CombinedOutput()
+    if err != nil {
+        return nil, fmt.Errorf("pipeline step failed: %v\nOutput: %s", err, string(output))
+    }
+    
+    // Parse JSON result
+    var result map[string]interface{}
+    if err := json.Unmarshal(output, &result); err != nil {
+        return nil, fmt.Errorf("failed to parse pipeline output: %w\nOutput: %s", err, string(output))
+    }
+    
+    return result, nil
+}
+
+// pipelineCommand prepares a project_pipeline.py invocation with the given arguments
+func (a *App) pipelineCommand(args ...string) *exec.Cmd {
     // Get Python command
     pythonCmd := a.getPythonCommand()
     
@@ -1007,8 +1080,7 @@ func (a *App) RunPipelineStep(projectID string, step string) (map[string]interfa
     
     scriptPath := filepath.Join(pythonDir, "project_pipeline.py")
     
-    // Prepare command
-    cmd := exec.Command(pythonCmd, scriptPath, projectDir, step)
+    cmd := exec.Command(pythonCmd, append([]string{scriptPath}, args...)...)
     cmd.Dir = pythonDir
     
     // Set environment variables
@@ -1016,25 +1088,132 @@ func (a *App) RunPipelineStep(projectID string, step string) (map[string]interfa
         fmt.Sprintf("PYTHONPATH=%s", pythonDir),
     )
     
-    // Execute command and capture output
-    output, err := cmd.CombinedOutput()
+    return cmd
+}
+
+// pipelineSocketPath returns where `project_pipeline.py --serve` listens for a project
+func pipelineSocketPath(projectDir string) string {
+    return filepath.Join(projectDir, ".pipeline.sock")
+}
+
+// sendPipelineRequest sends one request line to the pipeline server and decodes the reply line
+func sendPipelineRequest(projectDir string, step string) (map[string]interface{}, error) {
+    conn, err := net.DialTimeout("unix", pipelineSocketPath(projectDir), time.Second)
     if err != nil {
-        return nil, fmt.Errorf("pipeline step failed: %v\nOutput: %s", err, string(output))
+        return nil, err
     }
+    defer conn.Close()
     
-    // Parse JSON result
-    var result map[string]interface{}
-    if err := json.Unmarshal(output, &result); err != nil {
-        return nil, fmt.Errorf("failed to parse pipeline output: %w\nOutput: %s", err, string(output))
+    request, _ := json.Marshal(map[string]string{"step": step})
+    if _, err := conn.Write(append(request, '\n')); err != nil {
+        return nil, err
     }
     
+    line, err := bufio.NewReader(conn).ReadBytes('\n')
+    if err != nil {
+        return nil, err
+    }
+    
+    var result map[string]interface{}
+    if err := json.Unmarshal(line, &result); err != nil {
+        return nil, err
+    }
     return result, nil
 }
 
+// runPipelineStepOnSocket runs a step on the pipeline server, reporting false if none is reachable
+func (a *App) runPipelineStepOnSocket(projectDir string, step string) (map[string]interface{}, bool) {
+    if _, err := os.Stat(pipelineSocketPath(projectDir)); err != nil {
+        return nil, false
+    }
+    
+    result, err := sendPipelineRequest(projectDir, step)
+    if err != nil {
+        return nil, false
+    }
+    return result, true
+}
+
+// pipelineWorker is a `project_pipeline.py --stdio` process that runs steps sent as JSON lines
+type pipelineWorker struct {
+    cmd    *exec.Cmd
+    stdin  io.WriteCloser
+    stdout *bufio.Reader
+}
+
+// startPipelineWorker launches a stdio pipeline worker for a project
+func (a *App) startPipelineWorker(projectDir string) (*pipelineWorker, error) {
+    cmd := a.pipelineCommand(projectDir, "--stdio")
+    
+    stdin, err := cmd.StdinPipe()
+    if err != nil {
+        return nil, err
+    }
+    stdout, err := cmd.StdoutPipe()
+    if err != nil {
+        return nil, err
+    }
+    if err := cmd.Start(); err != nil {
+        return nil, err
+    }
+    
+    return &pipelineWorker{cmd: cmd, stdin: stdin, stdout: bufio.NewReader(stdout)}, nil
+}
+
+// runStep sends one step to the worker and waits for its result line
+func (w *pipelineWorker) runStep(step string) (map[string]interface{}, error) {
+    request, _ := json.Marshal(map[string]string{"step": step})
+    if _, err := w.stdin.Write(append(request, '\n')); err != nil {
+        return nil, err
+    }
+    
+    for {
+        line, err := w.stdout.ReadBytes('\n')
+        if err != nil {
+            return nil, fmt.Errorf("pipeline worker exited: %w", err)
+        }
+        
+        // Skip anything printed before the worker took over stdout
+        if !strings.HasPrefix(strings.TrimSpace(string(line)), "{") {
+            continue
+        }
+        
+        var result map[string]interface{}
+        if err := json.Unmarshal(line, &result); err != nil {
+            return nil, fmt.Errorf("failed to parse pipeline worker output: %w", err)
+        }
+        return result, nil
+    }
+}
+
+// close ends the worker by closing its stdin and waits for it to exit
+func (w *pipelineWorker) close() {
+    w.stdin.Close()
+    w.cmd.Wait()
+}
+
 // RunFullPipeline executes the complete pipeline for a project
 func (a *App) RunFullPipeline(projectID string) (map[string]interface{}, error) {
     steps := []string{"download", "transcribe", "translate", "synthesize", "combine"}
     
+    // Run all steps as one "all" request in a warm Python process, so project.json is snapshotted once per run
+    if projectDir, err := a.findProjectDirectory(projectID); err == nil {
+        if worker, err := a.startPipelineWorker(projectDir); err == nil {
+            results, err := worker.runStep("all")
+            worker.close()
+            if err == nil {
+                if success, ok := results["success"].(bool); !ok || !success {
+                    if step, ok := results["failedStep"].(string); ok {
+                        return results, fmt.Errorf("pipeline step '%s' failed", step)
+                    }
+                    return results, fmt.Errorf("pipeline failed: %v", results["error"])
+                }
+                return results, nil
+            }
+        }
+    }
+    
+    // Fall back to a process per step if the worker could not be started or died mid-run
     results := make(map[string]interface{})
     results["steps"] = make(map[string]interface{})
     
@@ -1,8 +1,77 @@
 import os
+import logging
+from functools import lru_cache
 from typing import List, Dict, Tuple, Optional
 from pathlib import Path
-import json
 from structs.DubSegment import DubSegment
+from util.json_io import load_json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# Common video extensions that yt-dlp might download, in preference order
+_VIDEO_EXTS = ('mp4', 'webm', 'mkv', 'avi', 'mov', 'flv', 'm4v')
+
+# Directory listings keyed by path, invalidated when the directory mtime changes
+_DIR_CACHE: Dict[str, Tuple[int, frozenset]] = {}
+
+def _listdir_cached(path: str) -> frozenset:
+    """Return the names in a directory, re-reading it only when its mtime changes"""
+    path = str(path)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        _DIR_CACHE.pop(path, None)
+        return frozenset()
+    
+    cached = _DIR_CACHE.get(path)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+    
+    with os.scandir(path) as it:
+        names = frozenset(entry.name for entry in it)
+    _DIR_CACHE[path] = (mtime_ns, names)
+    return names
+
+def _read_segment_count(segment_data_path: Path) -> Optional[int]:
+    """Read the .count sidecar next to a segments file, or None if missing or stale"""
+    count_path = segment_data_path.with_suffix(".count")
+    try:
+        # A segments file edited after the sidecar was written makes the count stale
+        if os.stat(count_path).st_mtime_ns < os.stat(segment_data_path).st_mtime_ns:
+            return None
+        with open(count_path, "rb") as f:
+            return int(f.read(16))
+    except (OSError, ValueError):
+        return None
+
+def _load_segments_json(path) -> List[Dict]:
+    """Parse a segments file, reusing the last parse while its mtime and size are unchanged"""
+    # The cached list is shared by every caller, so treat it as read-only
+    st = os.stat(path)
+    
+    # Prefer the MessagePack copy written by save_segments unless the JSON is newer
+    if msgpack is not None:
+        packed_path = Path(path).with_suffix(".msgpack")
+        try:
+            packed_st = os.stat(packed_path)
+        except FileNotFoundError:
+            packed_st = None
+        if packed_st and packed_st.st_mtime_ns >= st.st_mtime_ns:
+            return _parse_segments_file(str(packed_path), packed_st.st_mtime_ns, packed_st.st_size)
+    
+    return _parse_segments_file(str(path), st.st_mtime_ns, st.st_size)
+
+@lru_cache(maxsize=64)
+def _parse_segments_file(path: str, mtime_ns: int, size: int) -> List[Dict]:
+    if path.endswith(".msgpack"):
+        with open(path, "rb") as f:
+            return msgpack.unpackb(f.read(), raw=False)
+    return load_json(path)
 
 def check_video_exists(video_id: str, output_dir: str = None) -> Optional[str]:
     """Check if video file already exists and return its path"""
@@ -10,31 +79,32 @@ def check_video_exists(video_id: str, output_dir: str = None) -> Optional[str]:
     if output_dir is None:
         output_dir = os.path.join(project_root, "data", "audio_clips")
     
-    # Common video extensions that yt-dlp might download
-    extensions = ['mp4', 'webm', 'mkv', 'avi', 'mov', 'flv', 'm4v']
+    # One (cached) directory read instead of one stat per extension
+    entries = _listdir_cached(output_dir)
     
-    for ext in extensions:
-        video_path = os.path.join(output_dir, f"{video_id}.{ext}")
-        if os.path.exists(video_path):
-            print(f"✅ Video already exists: {video_path}")
+    for ext in _VIDEO_EXTS:
+        filename = f"{video_id}.{ext}"
+        if filename in entries:
+            video_path = os.path.join(output_dir, filename)
+            logger.info(f"✅ Video already exists: {video_path}")
             return video_path
     
     return None
 
 def check_transcript_exists(video_id: str, output_dir: str) -> Optional[List[Dict]]:
     """Check if transcript file already exists and load it"""
-    os.makedirs(output_dir, exist_ok=True)
+    # Read-only probe: a missing directory is an empty listing, writers create it
+    entries = _listdir_cached(output_dir)
     
     # Check for WhisperX JSON output first
     whisperx_path = os.path.join(output_dir, f"{video_id}.json")
-    if os.path.exists(whisperx_path):
-        print(f"✅ WhisperX transcript already exists: {whisperx_path}")
+    if f"{video_id}.json" in entries:
+        logger.info(f"✅ WhisperX transcript already exists: {whisperx_path}")
         try:
-            with open(whisperx_path, "r", encoding="utf-8") as f:
-                result = json.load(f)
-                return result.get("segments", [])
+            result = load_json(whisperx_path)
+            return result.get("segments", [])
         except Exception as e:
-            print(f"⚠️ Error loading existing WhisperX transcript: {e}")
+            logger.warning(f"⚠️ Error loading existing WhisperX transcript: {e}")
     
     # Check for YouTube transcript files
     youtube_files = [
@@ -44,13 +114,12 @@ def check_transcript_exists(video_id: str, output_dir: str) -> Optional[List[Dic
     
     for filename in youtube_files:
         transcript_path = os.path.join(output_dir, filename)
-        if os.path.exists(transcript_path):
-            print(f"✅ YouTube transcript already exists: {transcript_path}")
+        if filename in entries:
+            logger.info(f"✅ YouTube transcript already exists: {transcript_path}")
             try:
-                with open(transcript_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
+                return load_json(transcript_path)
             except Exception as e:
-                print(f"⚠️ Error loading existing YouTube transcript: {e}")
+                logger.warning(f"⚠️ Error loading existing YouTube transcript: {e}")
     
     return None
 
@@ -59,57 +128,70 @@ def check_audio_synthesis_exists(video_id: str, segments: List[DubSegment], audi
     segment_data_path = Path(audio_dir) / f"{video_id}_segments.json"
     
     # Check if segments JSON file exists
-    if not segment_data_path.exists():
-        print("📄 No existing segments file found")
+    audio_dir_entries = _listdir_cached(audio_dir)
+    if segment_data_path.name not in audio_dir_entries:
+        logger.info("📄 No existing segments file found")
         return False, []
     
     try:
+        # With overwrite enabled a count mismatch means re-synthesis, which the
+        # sidecar can tell us without parsing the whole segments file
+        if overwrite_segments and segment_data_path.with_suffix(".count").name in audio_dir_entries:
+            existing_count = _read_segment_count(segment_data_path)
+            if existing_count is not None and existing_count != len(segments):
+                logger.warning(f"⚠️ Segment count mismatch: existing={existing_count}, current={len(segments)}")
+                return False, []
+        
         # Load existing segments data
-        with open(segment_data_path, "r", encoding="utf-8") as f:
-            existing_segments_data = json.load(f)
+        existing_segments_data = _load_segments_json(segment_data_path)
         
-        print(f"📄 Found existing segments file with {len(existing_segments_data)} segments")
+        logger.info(f"📄 Found existing segments file with {len(existing_segments_data)} segments")
         
         # Check if segment count matches
         if len(existing_segments_data) != len(segments):
-            print(f"⚠️ Segment count mismatch: existing={len(existing_segments_data)}, current={len(segments)}")
+            logger.warning(f"⚠️ Segment count mismatch: existing={len(existing_segments_data)}, current={len(segments)}")
             if not overwrite_segments:
-                print("🔒 Using existing segments (overwrite disabled, preserving manual edits)")
+                logger.info("🔒 Using existing segments (overwrite disabled, preserving manual edits)")
                 # Use the existing segments count as the authoritative source
                 segments.clear()
-                segments.extend([DubSegment(**seg_data) for seg_data in existing_segments_data])
+                segments.extend([DubSegment.from_dict(seg_data) for seg_data in existing_segments_data])
             else:
                 return False, []
         
-        # Check if all audio files exist
-        audio_paths = []
+        # Check if all audio files exist, against the single audio_dir listing
+        audio_paths = [None] * len(existing_segments_data)
         missing_files = []
+        audio_dir_norm = os.path.normpath(audio_dir)
+        audio_dir_prefix = os.path.join(audio_dir, "")
+        expected_names = [f"chunk_{idx:03d}.mp3" for idx in range(len(existing_segments_data))]
         
         for idx, existing_seg in enumerate(existing_segments_data):
-            audio_file = existing_seg.get('audio_file')
-            if audio_file and os.path.exists(audio_file):
-                audio_paths.append(audio_file)
+            # Synthesis records each segment's audio path; only older files lack it
+            audio_file = existing_seg.get('audio_file') or audio_dir_prefix + expected_names[idx]
+            if os.path.normpath(os.path.dirname(audio_file)) == audio_dir_norm:
+                audio_file_exists = os.path.basename(audio_file) in audio_dir_entries
+            else:
+                # Stored path points outside audio_dir, so it is not in the listing
+                audio_file_exists = os.path.exists(audio_file)
+            
+            if audio_file_exists:
+                audio_paths[idx] = audio_file
             else:
-                # Try the standard naming pattern as fallback
-                mp3_filename = f"chunk_{idx:03d}.mp3"
-                mp3_path = os.path.join(audio_dir, mp3_filename)
-                if os.path.exists(mp3_path):
-                    audio_paths.append(mp3_path)
-                else:
-                    missing_files.append(f"chunk_{idx:03d}.mp3")
+                missing_files.append(os.path.basename(audio_file))
         
+        # Every slot is filled unless a file is missing, in which case we bail out here
         if missing_files:
-            print(f"⚠️ Missing audio files: {missing_files}")
+            logger.warning(f"⚠️ Missing audio files: {missing_files}")
             return False, []
         
-        # Update current segments with existing audio file paths
-        for idx, segment in enumerate(segments):
-            if idx < len(audio_paths):
-                segment.audio_file = audio_paths[idx] 
+        # Update current segments with existing audio file paths and their recorded durations
+        for segment, audio_path, existing_seg in zip(segments, audio_paths, existing_segments_data):
+            segment.audio_file = audio_path
+            segment.audio_duration = existing_seg.get('audio_duration')
         
-        print(f"✅ All {len(audio_paths)} audio files found - reusing existing synthesis")
+        logger.info(f"✅ All {len(audio_paths)} audio files found - reusing existing synthesis")
         return True, audio_paths
         
     except Exception as e:
-        print(f"⚠️ Error checking existing segments: {e}")
+        logger.warning(f"⚠️ Error checking existing segments: {e}")
         return False, []
@@ -1,19 +1,28 @@
-import json
 from pathlib import Path
 from typing import List
 
 from structs.DubSegment import DubSegment
+from checks.check_files_exist import _listdir_cached, _load_segments_json, _read_segment_count
 
 def load_existing_segments_if_available(video_id: str, segments: List[DubSegment], audio_dir: str) -> List[DubSegment]:
     """Load translation data from existing segments file if available"""
     segment_data_path = Path(audio_dir) / f"{video_id}_segments.json"
     
-    if not segment_data_path.exists():
+    # Shares the audio_dir listing with check_audio_synthesis_exists, which runs next
+    audio_dir_entries = _listdir_cached(audio_dir)
+    if segment_data_path.name not in audio_dir_entries:
         return segments
     
+    # Translations are only reused on an exact count match, which the
+    # .count sidecar can rule out without parsing the segments file
+    if segment_data_path.with_suffix(".count").name in audio_dir_entries:
+        existing_count = _read_segment_count(segment_data_path)
+        if existing_count is not None and existing_count != len(segments):
+            print("⚠️ Segment count changed - will retranslate")
+            return segments
+    
     try:
-        with open(segment_data_path, "r", encoding="utf-8") as f:
-            existing_segments_data = json.load(f)
+        existing_segments_data = _load_segments_json(segment_data_path)
         
         # If counts match, reuse translations
         if len(existing_segments_data) == len(segments):
@@ -1,27 +1,95 @@
 import os
 
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-    print("✅ Loaded environment variables from .env file")
-except ImportError:
-    print("⚠️ python-dotenv not installed. Install with: pip install python-dotenv")
-except Exception as e:
-    print(f"⚠️ Could not load .env file: {e}")
+_env_loaded = False
+
+def _ensure_env():
+    """Load the .env file and apply environment overrides, once, on first use"""
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+        print("✅ Loaded environment variables from .env file")
+    except ImportError:
+        print("⚠️ python-dotenv not installed. Install with: pip install python-dotenv")
+    except Exception as e:
+        print(f"⚠️ Could not load .env file: {e}")
+
+    # Override config keys with environment variables if provided
+    overrides = {key: value for env, key in _ENV_MAP.items() if (value := os.environ.get(env))}
+    config.update(overrides)
+
+    if "hf_token" in overrides:
+        print("🔑 HF token loaded from environment")
+
+        # Enable diarization if HF token is available
+        config["enable_diarization"] = True
+        print("🎭 Diarization automatically enabled (HF token found)")
+
+
+# Environment variable -> config key; later entries win for the same key
+_ENV_MAP = {
+    # File Directories
+    "KOKORO_VIDEO_OUTPUT_DIR": "video_output_dir",
+    "KOKORO_AUDIO_OUTPUT_DIR": "audio_output_dir",
+    "KOKORO_TRANSCRIPT_OUTPUT_DIR": "transcript_output_dir",
+    # API Keys
+    "ANTHROPIC_API_KEY": "claude_api_key",
+    "HUGGINGFACE_TOKEN": "hf_token",
+    "HF_TOKEN": "hf_token",
+}
+
+# Keys whose value may come from the environment / .env file
+_ENV_KEYS = set(_ENV_MAP.values()) | {"enable_diarization"}
+
+# Defaults that depend on the working directory, resolved on first access
+_LAZY_DEFAULTS = {
+    "transcript_output_dir": lambda: os.path.join(os.getcwd(), "data", "transcripts"), # Directory to save transcripts
+    "audio_output_dir": lambda: os.path.join(os.getcwd(), "output", "kokoro_audio"),
+}
+
+class _LazyConfig(dict):
+    """dict that loads .env and resolves cwd-based directories only when those keys are used"""
+
+    def _resolve(self, key):
+        if key in _ENV_KEYS:
+            _ensure_env()
+        if key in _LAZY_DEFAULTS and not dict.__contains__(self, key):
+            dict.__setitem__(self, key, _LAZY_DEFAULTS[key]())
+
+    def __getitem__(self, key):
+        self._resolve(key)
+        return dict.__getitem__(self, key)
+
+    def __setitem__(self, key, value):
+        # Apply environment overrides first so they can't clobber this value later
+        if key in _ENV_KEYS:
+            _ensure_env()
+        dict.__setitem__(self, key, value)
+
+    def __contains__(self, key):
+        self._resolve(key)
+        return dict.__contains__(self, key)
+
+    def get(self, key, default=None):
+        self._resolve(key)
+        return dict.get(self, key, default)
 
 
 kokoro_available_voices = {
     "es": ["ef_dora", "em_alex", "em_santa"]  # Available Spanish voices
 }
 
-config = {
+config = _LazyConfig({
     # Text-to-Speech
     "target_language": "es",  # Default target language for translation
     "kokoro_endpoint": "http://localhost:8880",  # Kokoro API endpoint
     "kokoro_speed": 1.1,  # Default speed for Kokoro synthesis
+    "tts_workers": 4,  # Concurrent Kokoro requests during synthesis
     "yt_dlp_path": "yt-dlp",  # Path to yt-dlp executable
-    "transcript_output_dir": os.path.join(os.getcwd(), "data", "transcripts"), # Directory to save transcripts
-    "audio_output_dir": os.path.join(os.getcwd(), "output", "kokoro_audio"),
     "force_whisperx": True,  # Force WhisperX transcription mode
     "rules_file": "text-rules.json",  # Path to rules file from GUI
     "kokoro_default_voice": kokoro_available_voices["es"][1],  # Default voice for Kokoro synthesis
@@ -43,10 +111,12 @@ config = {
     "output_volume": 2,           # Volume multiplier (1.0 = original, 2.0 = 2x louder)
     "normalize_audio": False,        # Enable professional audio normalization
     "audio_quality": "128k",        # Audio bitrate (128k, 192k, 256k, 320k)
+    "final_audio_codec": "mp3",     # Final track codec: "mp3", "aac" or "opus"
     "audio_sample_rate": 22050,     # Sample rate (22050, 44100, 48000)
     "prevent_clipping": True,       # Enable limiter to prevent distortion
     "background_volume": 0.7,  # Background audio volume (0.0 to 1.0)
     "vocal_volume": 1,       # Dubbed vocals volume (0.0 to 2.0+)
+    "keep_original_audio": False,  # Keep {video_id}_original_audio.wav instead of piping it into demucs
 
     # Audio Effects
     "audio_effects_preset": "voice",  # "voice", "podcast", "cinematic", "clean", or "off"
@@ -55,20 +125,5 @@ config = {
     "claude_api_key": "your_anthropic_key_here", 
     "translation_batch_size": 8,  # Process 8 segments at once
     "translation_context_size": 3,  # Include 3 previous segments for context
-}
-
-
-# Override config directories with environment variables if provided
-# File Directories
-if os.getenv("KOKORO_VIDEO_OUTPUT_DIR"):
-    config["video_output_dir"] = os.getenv("KOKORO_VIDEO_OUTPUT_DIR")
-if os.getenv("KOKORO_AUDIO_OUTPUT_DIR"):
-    config["audio_output_dir"] = os.getenv("KOKORO_AUDIO_OUTPUT_DIR")
-if os.getenv("KOKORO_TRANSCRIPT_OUTPUT_DIR"):
-    config["transcript_output_dir"] = os.getenv("KOKORO_TRANSCRIPT_OUTPUT_DIR")
-    
-# API Key
-if os.getenv("ANTHROPIC_API_KEY"):
-    config["claude_api_key"] = os.getenv("ANTHROPIC_API_KEY")
-if os.getenv("HF_TOKEN"):
-    config["hf_token"] = os.getenv("HF_TOKEN")
\ No newline at end of file
+    "translation_workers": 1,  # Concurrent translation batches; above 1, batches lose the previous translations as context
+})
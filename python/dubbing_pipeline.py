@@ -1,22 +1,23 @@
-import os, sys, re, subprocess, tempfile
-from urllib.parse import urlparse, parse_qs
+import os, sys, subprocess, tempfile, hashlib
 from typing import List, Dict
-from dataclasses import asdict
 from pathlib import Path
-import json
 import shutil
+from subprocess import DEVNULL, PIPE
+from concurrent.futures import ThreadPoolExecutor
 
 from rules.apply_segment_rules import apply_segment_rules
-from rules.apply_text_rules import apply_text_rules
-from util.translation_service import TranslationService 
+from rules.apply_text_rules import apply_text_rules, compile_text_rules
 from util.download_video import download_video, extract_audio_from_original_video
-from util.fetch_transcript import fetch_transcript
-from util.transcribe_with_whisperx import transcribe_with_whisperx
 from util.normalize.normalize_whisperx_segments import normalize_whisperx_segments
-from util.text_chunks_to_audio import text_chunks_to_audio
 from util.merge_audio_with_video import merge_audio_with_video
 from util.concatenate_audio import concatenate_audio
 from util.audio_effects import apply_audio_effects
+from util.save_segments import save_segments
+from util.extract_video_id import extract_video_id
+from util.link_or_copy import link_or_copy
+from util.probe_duration import probe_duration
+from util.stderr_tail import stderr_tail
+from util.final_audio_codec import mix_audio_extension, encode_final_audio
 
 from checks.check_files_exist import check_audio_synthesis_exists
 from checks.load_existing_segments_if_available import load_existing_segments_if_available
@@ -31,49 +32,75 @@ from sync.create_enhanced_audio_track_with_loose_sync import create_enhanced_aud
 
 overwrite_segments = config.get("overwrite_segments_json", False)
 
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-    print("✅ Loaded environment variables from .env file")
-except ImportError:
-    print("⚠️ python-dotenv not installed. Install with: pip install python-dotenv")
-except Exception as e:
-    print(f"⚠️ Could not load .env file: {e}")
-
-# Override config directories with environment variables if provided
-if os.getenv("KOKORO_VIDEO_OUTPUT_DIR"):
-    config["video_output_dir"] = os.getenv("KOKORO_VIDEO_OUTPUT_DIR")
-if os.getenv("KOKORO_AUDIO_OUTPUT_DIR"):
-    config["audio_output_dir"] = os.getenv("KOKORO_AUDIO_OUTPUT_DIR")
-if os.getenv("KOKORO_TRANSCRIPT_OUTPUT_DIR"):
-    config["transcript_output_dir"] = os.getenv("KOKORO_TRANSCRIPT_OUTPUT_DIR")
-
+# .env loading and environment overrides are applied by config on first use
 print(f"📁 Video output: {config['video_output_dir']}")
 print(f"📁 Audio output: {config['audio_output_dir']}")
 print(f"📁 Transcript output: {config['transcript_output_dir']}")
 
-# Update config with environment variables if they exist
-env_hf_token = os.getenv("HF_TOKEN") or os.getenv("HUGGINGFACE_TOKEN")
-if env_hf_token:
-    config["hf_token"] = env_hf_token
-    print("🔑 HF token loaded from environment")
+# Background stems keyed by a hash of the demucs input, shared across runs
+STEMS_CACHE_DIR = Path.home() / ".voiceweave" / "stems_cache"
+
+def _stems_cache_path(source_path: str) -> Path:
+    """Cache location of the background stem for a given input file"""
+    digest = hashlib.sha256()
+    with open(source_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return STEMS_CACHE_DIR / f"{digest.hexdigest()[:16]}_no_vocals.wav"
 
-# Enable diarization if HF token is available
-if config.get("hf_token") and config["hf_token"] != "your_huggingface_token_here":
-    config["enable_diarization"] = True
-    print("🎭 Diarization automatically enabled (HF token found)")
+def _restore_cached_stem(cache_path: Path, background_output_path: str) -> bool:
+    """Copy a cached background stem into place, returning False on a cache miss"""
+    if not cache_path.exists():
+        return False
+    shutil.copy2(cache_path, background_output_path)
+    print(f"✅ Reusing cached background audio: {cache_path}")
+    return True
+
+def _store_cached_stem(background_output_path: str, cache_path: Path):
+    """Save a freshly separated background stem to the cache"""
+    # Copy to a temp file and rename, so an interrupted or concurrent copy never leaves a truncated stem to reuse
+    tmp_path = None
+    try:
+        STEMS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=STEMS_CACHE_DIR, suffix=".tmp")
+        os.close(fd)
+        shutil.copy2(background_output_path, tmp_path)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"⚠️ Could not cache background audio: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _demucs_device() -> str:
+    """Run demucs on the GPU when torch can see one"""
+    try:
+        import torch
+    except ImportError:
+        return "cpu"
+    return "cuda" if torch.cuda.is_available() else "cpu"
 
 def separate_stems(audio_path: str, background_output_path: str):
     """Separate vocals from background using demucs"""
+    cache_path = _stems_cache_path(audio_path)
+    if _restore_cached_stem(cache_path, background_output_path):
+        return True
+    
+    if not _run_demucs_cli(audio_path, background_output_path):
+        return False
+    _store_cached_stem(background_output_path, cache_path)
+    return True
+
+def _run_demucs_cli(audio_path: str, background_output_path: str):
+    """Run the demucs CLI on an audio file and copy out the no_vocals stem"""
     print("🎵 Separating vocals from background audio...")
     
-    # Create temp directory for demucs output
-    temp_dir = tempfile.mkdtemp()
+    # Create temp directory for demucs output (prefixed, it runs alongside transcription)
+    temp_dir = tempfile.mkdtemp(prefix="demucs_")
     
     try:
         # Run demucs with two-stems=vocals
         subprocess.run([
-            "demucs", "--two-stems=vocals", "-o", temp_dir, audio_path
+            "demucs", "-d", _demucs_device(), "--two-stems=vocals", "-o", temp_dir, audio_path
         ], check=True)
         
         # Find the background audio (no_vocals)
@@ -96,145 +123,97 @@ def separate_stems(audio_path: str, background_output_path: str):
         # Clean up temp directory
         shutil.rmtree(temp_dir, ignore_errors=True)
 
-def create_enhanced_audio_track(segments: List[DubSegment], output_path: str, total_duration: float, audio_settings: Dict, background_audio_path: str = None):
-    """Create audio track with enhanced transitions, rules applied, and background audio"""
-    import tempfile
+def _decode_f32_pcm(video_path: str, samplerate: int, channels: int) -> bytearray:
+    """Decode a file's audio to interleaved float32 PCM, read straight into one buffer"""
+    frame_bytes = 4 * channels
+    cmd = [
+        "ffmpeg", "-v", "error", "-i", video_path, "-vn",
+        "-f", "f32le", "-ar", str(samplerate), "-ac", str(channels), "pipe:1"
+    ]
     
-    print("🎯 Creating enhanced audio track with custom rules...")
+    # Size the buffer from the probed duration (plus a second) so it rarely has to grow
+    try:
+        seconds = probe_duration(video_path) + 1
+    except Exception:
+        seconds = 600
+    buf = bytearray(int(seconds * samplerate) * frame_bytes)
     
-    # Create a silent base track
-    silent_track = os.path.join(tempfile.gettempdir(), "silent_base.wav")
-    subprocess.run([
-        "ffmpeg", "-y", "-f", "lavfi", "-i", f"anullsrc=duration={total_duration}:sample_rate=22050:channel_layout=mono",
-        silent_track
-    ], check=True, capture_output=True)
+    filled = 0
+    with subprocess.Popen(cmd, stdin=DEVNULL, stdout=PIPE, stderr=DEVNULL, bufsize=0) as proc:
+        while True:
+            if filled == len(buf):
+                buf.extend(bytes(60 * samplerate * frame_bytes))  # Probe came up short: another minute
+            with memoryview(buf) as view, view[filled:] as tail:
+                n = proc.stdout.readinto(tail)
+            if not n:
+                break
+            filled += n
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
     
-    # Calculate timing with enhanced logic
-    timed_segments = []
-    current_end_time = 0.0
+    # Drop the unused tail in place, keeping whole frames only
+    del buf[filled - filled % frame_bytes:]
+    return buf
+
+def separate_stems_from_video(video_path: str, background_output_path: str):
+    """Separate the background straight from the video, piping decoded audio into demucs"""
+    cache_path = _stems_cache_path(video_path)
+    if _restore_cached_stem(cache_path, background_output_path):
+        return True
     
-    for i, segment in enumerate(segments):
-        if not segment.audio_file or not os.path.exists(segment.audio_file):
-            continue
-            
-        original_start = segment.start
-        original_end = segment.end
-        
-        # Get actual duration of the synthesized audio
+    try:
+        import torch
+        import demucs.api
+    except ImportError:
+        # Older demucs releases have no Python API, so go through a temporary WAV
+        temp_dir = tempfile.mkdtemp(prefix="demucs_input_")
         try:
-            result = subprocess.run([
-                "ffprobe", "-v", "quiet", "-show_entries", "format=duration",
-                "-of", "csv=p=0", segment.audio_file
-            ], capture_output=True, text=True, check=True)
-            audio_duration = float(result.stdout.strip())
-        except:
-            audio_duration = original_end - original_start
-        
-        # Enhanced timing logic with rules
-        natural_start_time = current_end_time + segment.buffer_before
-        
-        # Apply audio settings
-        if audio_settings.get("preventOverlaps", True):
-            min_gap = audio_settings.get("minGap", 100) / 1000.0
-            start_time = max(natural_start_time, current_end_time + min_gap)
-        else:
-            start_time = natural_start_time
-        
-        # Check for crossfade requirements
-        should_crossfade = (
-            audio_settings.get("globalCrossfade", False) or 
-            segment.priority >= 2  # High priority segments get crossfade
-        )
-        
-        if should_crossfade:
-            crossfade_duration = audio_settings.get("crossfadeDuration", 150) / 1000.0
-            start_time = max(0, start_time - crossfade_duration / 2)
-        
-        # Timing sync logic (every 3rd segment)
-        should_sync_to_original = (
-            original_start > current_end_time and 
-            (original_start - current_end_time) < 2.0 and
-            i % 3 == 0
-        )
+            audio_path = os.path.join(temp_dir, "original_audio.wav")
+            subprocess.run([
+                "ffmpeg", "-y", "-v", "error", "-i", video_path, "-vn", "-acodec", "pcm_s16le",
+                "-ar", "44100", "-ac", "2", audio_path
+            ], check=True, stdin=DEVNULL, stdout=DEVNULL, stderr=PIPE)
+            if not _run_demucs_cli(audio_path, background_output_path):
+                return False
+            _store_cached_stem(background_output_path, cache_path)
+            return True
+        except subprocess.CalledProcessError as e:
+            print(f"❌ Audio extraction for demucs failed: {e}\n{stderr_tail(e)}")
+            return False
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    print("🎵 Separating vocals from background audio...")
+    try:
+        separator = demucs.api.Separator(model="htdemucs", device=_demucs_device())
+        channels = separator.audio_channels
         
-        if should_sync_to_original and not should_crossfade:
-            start_time = original_start + 0.1
-            print(f"   📍 Segment {i}: Syncing to original timing at {start_time:.2f}s")
-        else:
-            print(f"   ➡️  Segment {i}: Enhanced flow at {start_time:.2f}s")
+        # Decode to raw float PCM on stdout, so the original audio never touches disk
+        pcm = _decode_f32_pcm(video_path, separator.samplerate, channels)
+        wav = torch.frombuffer(pcm, dtype=torch.float32).view(-1, channels).t()
         
-        timed_segments.append({
-            'segment': segment,
-            'start_time': start_time,
-            'duration': audio_duration,
-            'crossfade': should_crossfade,
-            'index': i
-        })
+        _, stems = separator.separate_tensor(wav, separator.samplerate)
         
-        current_end_time = start_time + audio_duration + segment.buffer_after
-    
-    if not timed_segments:
-        print("⚠️ No audio segments to process")
+        # Same as --two-stems=vocals: everything that isn't vocals is background
+        background = sum(stem for name, stem in stems.items() if name != "vocals")
+        demucs.api.save_audio(background, background_output_path, samplerate=separator.samplerate)
+        print(f"✅ Background audio extracted: {background_output_path}")
+        _store_cached_stem(background_output_path, cache_path)
+        return True
+    except (subprocess.CalledProcessError, RuntimeError) as e:
+        print(f"❌ Demucs separation failed: {e}")
         return False
+
+def copy_to_input_folder(video_path: str, input_video_path: str):
+    """Place the original video in ./input (runs on a background thread)"""
+    method = link_or_copy(video_path, input_video_path)
     
-    # Build enhanced FFmpeg command with background audio support
-    if background_audio_path and os.path.exists(background_audio_path):
-        cmd = ["ffmpeg", "-y", "-i", background_audio_path, "-i", silent_track]
-        background_input_index = 0
-        audio_input_offset = 2  # Vocals start at input 2
-        print(f"🎵 Including background audio: {background_audio_path}")
-    else:
-        cmd = ["ffmpeg", "-y", "-i", silent_track]
-        background_input_index = None
-        audio_input_offset = 1  # Vocals start at input 1
-        print("🎵 No background audio - dubbed vocals only")
-    
-    # Add all audio files as inputs
-    for ts in timed_segments:
-        cmd.extend(["-i", ts['segment'].audio_file])
-        
-    # Build filter - delay all inputs then mix them
-    filter_parts = []
-
-    # Add all delayed inputs
-    for i, ts in enumerate(timed_segments):
-        input_index = i + audio_input_offset
-        delay_ms = int(ts['start_time'] * 1000)
-        print(f"🔍 DEBUG: Segment {i} delay = {delay_ms}ms ({ts['start_time']:.2f}s)")
-        filter_parts.append(f"[{input_index}:a]adelay={delay_ms}|{delay_ms}[delayed{i}]")
-
-    # Mix all delayed inputs together
-    delayed_inputs = [f"[delayed{i}]" for i in range(len(timed_segments))]
-    
-    if background_input_index is not None:
-        # Mix background with dubbed vocals (background at 30% volume, vocals at 100%)
-        background_weight = audio_settings.get("backgroundVolume", 0.3)
-        vocal_weights = " ".join(["1.0"] * len(timed_segments))
-        mix_filter = f"[{background_input_index}:a]" + "".join(delayed_inputs) + f"amix=inputs={len(timed_segments)+1}:duration=longest:weights={background_weight} {vocal_weights}[final]"
+    if os.path.exists(input_video_path):
+        file_size = os.path.getsize(input_video_path)
+        print(f"✅ Original video saved via {method}: {input_video_path} ({file_size / (1024*1024):.1f} MB)")
     else:
-        mix_filter = "".join(delayed_inputs) + f"amix=inputs={len(timed_segments)}:duration=longest[final]"
-    
-    filter_parts.append(mix_filter)
+        print(f"❌ Failed to copy original video")
 
-    filter_complex = ";".join(filter_parts)
-    final_output = "[final]"
-    
-    cmd.extend([
-        "-filter_complex", filter_complex,
-        "-map", final_output,
-        "-c:a", "libmp3lame",
-        "-b:a", "128k",
-        output_path
-    ])
-    
-    try:
-        subprocess.run(cmd, check=True, capture_output=True)
-        print(f"✅ Enhanced audio track created: {output_path}")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"⚠️ Enhanced audio creation failed, falling back to simple method: {e}")
-        return False
-    
 def update_config_for_loose_sync():
     """Add IMPROVED loose sync settings to your config"""
     config["looseSyncSettings"] = {
@@ -277,21 +256,6 @@ def print_timing_summary(timed_segments: List[Dict]):
     print(f"   Max drift: +{max_positive_drift:.2f}s / {max_negative_drift:.2f}s")
     print(f"   ✅ No overlaps guaranteed, loose sync maintained\n")
 
-def extract_video_id(url_or_id: str) -> str:
-    # If it's already a YouTube ID (11 chars, alphanumeric, typical format)
-    if re.match(r"^[\w-]{11}$", url_or_id):
-        return url_or_id
-
-    # Try parsing the URL
-    parsed = urlparse(url_or_id)
-    if parsed.hostname in ("www.youtube.com", "youtube.com"):
-        query = parse_qs(parsed.query)
-        return query.get("v", [None])[0]
-    elif parsed.hostname == "youtu.be":
-        return parsed.path.lstrip("/")
-    else:
-        return None  # Invalid format
-
 def main(youtube_url_or_id: str, target_lang: str = "es"):
     video_id = extract_video_id(youtube_url_or_id)
     if not video_id:
@@ -307,184 +271,192 @@ def main(youtube_url_or_id: str, target_lang: str = "es"):
     audio_dir = config["audio_output_dir"]
     os.makedirs(audio_dir, exist_ok=True)
 
-    # One video exists:
-    if original_video_path and os.path.exists(original_video_path):
-        # Debug original duration
-        try:
-            # Creates {video_id}_original_audio.wav (for stem separation)
-            # Stem separation audio: 44.1kHz, stereo (for better quality separation)
-            result = subprocess.run([
-                "ffprobe", "-v", "quiet", "-show_entries", "format=duration",
-                "-of", "csv=p=0", original_video_path
-            ], capture_output=True, text=True, check=True)
-            original_duration = float(result.stdout.strip())
-            print(f"🔍 DEBUG: ORIGINAL video duration: {original_duration:.2f}s ({original_duration/60:.1f} min)")
-        except Exception as e:
-            print(f"🔍 DEBUG: Could not get original video duration: {e}")
-
-        # Extract audio from video for stem separation
-        original_audio_path = os.path.join(audio_dir, f"{video_id}_original_audio.wav")
-        print("🎵 Extracting audio from video...")
-        subprocess.run([
-            "ffmpeg", "-y", "-i", original_video_path, "-vn", "-acodec", "pcm_s16le", 
-            "-ar", "44100", "-ac", "2", original_audio_path
-        ], check=True)
-        
-        # Run demucs stem separation
-        background_audio_path = os.path.join(audio_dir, f"{video_id}_background.wav")
-        stem_success = separate_stems(original_audio_path, background_audio_path)
-        
-        if not stem_success:
-            print("⚠️ Stem separation failed, proceeding without background audio")
-            background_audio_path = None
-
-        # 🔥 SIMPLE VERSION: Copy to input folder only
-        original_filename = os.path.basename(original_video_path)
-        input_video_dir = "./input"
-        os.makedirs(input_video_dir, exist_ok=True)
-        input_video_path = os.path.join(input_video_dir, f"{video_id}_original{os.path.splitext(original_filename)[1]}")
+    # Demucs and the ./input copy run in the background while we transcribe
+    background_executor = ThreadPoolExecutor(max_workers=2)
+    try:
+        stem_future = None
+        copy_future = None
+        video_duration = None
+
+        # One video exists:
+        if original_video_path and os.path.exists(original_video_path):
+            # Probe the duration once; it is reused for the final audio track
+            try:
+                video_duration = probe_duration(original_video_path)
+                print(f"🔍 DEBUG: ORIGINAL video duration: {video_duration:.2f}s ({video_duration/60:.1f} min)")
+            except Exception as e:
+                print(f"🔍 DEBUG: Could not get original video duration: {e}")
+
+            # Run demucs stem separation
+            background_audio_path = os.path.join(audio_dir, f"{video_id}_background.wav")
+            if config.get("keep_original_audio", False):
+                # Extract audio from video for stem separation
+                original_audio_path = os.path.join(audio_dir, f"{video_id}_original_audio.wav")
+                print("🎵 Extracting audio from video...")
+                subprocess.run([
+                    "ffmpeg", "-y", "-i", original_video_path, "-vn", "-acodec", "pcm_s16le", 
+                    "-ar", "44100", "-ac", "2", original_audio_path
+                ], check=True)
+                stem_future = background_executor.submit(separate_stems, original_audio_path, background_audio_path)
+            else:
+                stem_future = background_executor.submit(separate_stems_from_video, original_video_path, background_audio_path)
 
-        print(f"📁 Copying original video to input folder...")
-        shutil.copy2(original_video_path, input_video_path)
+            # 🔥 SIMPLE VERSION: Copy to input folder only
+            original_filename = os.path.basename(original_video_path)
+            input_video_dir = "./input"
+            os.makedirs(input_video_dir, exist_ok=True)
+            input_video_path = os.path.join(input_video_dir, f"{video_id}_original{os.path.splitext(original_filename)[1]}")
 
-        if os.path.exists(input_video_path):
-            file_size = os.path.getsize(input_video_path)
-            print(f"✅ Original video saved: {input_video_path} ({file_size / (1024*1024):.1f} MB)")
+            print(f"📁 Copying original video to input folder...")
+            copy_future = background_executor.submit(copy_to_input_folder, original_video_path, input_video_path)
         else:
-            print(f"❌ Failed to copy original video")
-    else:
-        background_audio_path = None
+            background_audio_path = None
 
-    print(f"🔍 DEBUG: video_path returned: {original_video_path}")
-    print(f"🔍 DEBUG: config['video_output_dir']: {config['video_output_dir']}")
-    print(f"🔍 DEBUG: Current working directory: {os.getcwd()}")
+        print(f"🔍 DEBUG: video_path returned: {original_video_path}")
+        print(f"🔍 DEBUG: config['video_output_dir']: {config['video_output_dir']}")
+        print(f"🔍 DEBUG: Current working directory: {os.getcwd()}")
 
-    if not original_video_path:
-        print("❌ Could not download or find video file.")
-        sys.exit(1)
+        if not original_video_path:
+            print("❌ Could not download or find video file.")
+            sys.exit(1)
 
-    force_whisperx = config.get("force_whisperx", True)
+        force_whisperx = config.get("force_whisperx", True)
     
-    if force_whisperx and overwrite_segments:
-        print("⚙️ Force WhisperX mode enabled — checking for existing transcription first.")
-        transcript = transcribe_with_whisperx(video_id, output_dir=config["transcript_output_dir"], mode="whisperx")
-    else:
-        transcript = fetch_transcript(video_id, output_dir=config["transcript_output_dir"], mode="human")
+        # Imported here so that loading this module (e.g. for extract_video_id) stays cheap
+        from util.fetch_transcript import fetch_transcript
+        from util.transcribe_with_whisperx import transcribe_with_whisperx
+
+        if force_whisperx and overwrite_segments:
+            print("⚙️ Force WhisperX mode enabled — checking for existing transcription first.")
+            transcript = transcribe_with_whisperx(video_id, output_dir=config["transcript_output_dir"], mode="whisperx")
+        else:
+            transcript = fetch_transcript(video_id, output_dir=config["transcript_output_dir"], mode="human")
+            if not transcript:
+                print("⚠️ No transcript data. Attempting to transcribe with WhisperX.")
+                return
+
         if not transcript:
-            print("⚠️ No transcript data. Attempting to transcribe with WhisperX.")
+            print("❌ Could not obtain transcript data.")
             return
 
-    if not transcript:
-        print("❌ Could not obtain transcript data.")
-        return
-
-    segments = normalize_whisperx_segments(transcript)
+        segments = normalize_whisperx_segments(transcript)
 
-    # Load dubbing rules from GUI
-    dubbing_rules = load_dubbing_rules()
+        # Load dubbing rules from GUI
+        dubbing_rules = load_dubbing_rules()
     
-    # Apply segment rules for timing and transitions
-    segments = apply_segment_rules(segments, dubbing_rules.get("segmentRules", []))
+        # Apply segment rules for timing and transitions
+        segments = apply_segment_rules(segments, dubbing_rules.get("segmentRules", []))
 
-    # Check if we can reuse existing segments and audio synthesis
-    segments = load_existing_segments_if_available(video_id, segments, audio_dir)
-    audio_synthesis_exists, existing_audio_paths = check_audio_synthesis_exists(video_id, segments, audio_dir, overwrite_segments)
+        # Check if we can reuse existing segments and audio synthesis
+        segments = load_existing_segments_if_available(video_id, segments, audio_dir)
+        audio_synthesis_exists, existing_audio_paths = check_audio_synthesis_exists(video_id, segments, audio_dir, overwrite_segments)
 
-    print(f"🔍 DEBUG: synthesis_exists = {audio_synthesis_exists}")
-    print(f"🔍 DEBUG: existing_audio_paths = {existing_audio_paths}")
-    print(f"🔍 DEBUG: segments file path = {Path(audio_dir) / f'{video_id}_segments.json'}")
-    print(f"🔍 DEBUG: segments file exists = {os.path.exists(Path(audio_dir) / f'{video_id}_segments.json')}")
+        print(f"🔍 DEBUG: synthesis_exists = {audio_synthesis_exists}")
+        print(f"🔍 DEBUG: existing_audio_paths = {existing_audio_paths}")
+        print(f"🔍 DEBUG: segments file path = {Path(audio_dir) / f'{video_id}_segments.json'}")
+        print(f"🔍 DEBUG: segments file exists = {os.path.exists(Path(audio_dir) / f'{video_id}_segments.json')}")
 
-    segment_data_path = Path(audio_dir) / f"{video_id}_segments.json"
+        segment_data_path = Path(audio_dir) / f"{video_id}_segments.json"
 
-    if audio_synthesis_exists:
-        print("🎯 Reusing existing audio synthesis")
-        audio_paths = existing_audio_paths
-        
-        # Only save segments if overwrite is enabled AND we made changes
-        if overwrite_segments:
-            with open(segment_data_path, "w", encoding="utf-8") as f:
-                json.dump([asdict(seg) for seg in segments], f, indent=2, ensure_ascii=False)
-            print(f"📝 Updated segment metadata saved to {segment_data_path}")
-            
-    else:
-        # Need to translate and/or synthesize
-        print("🔄 Processing segments (translation and/or synthesis needed)")
-        
-        # Only translate if we don't have translations
-        needs_translation = any(not seg.translated_text for seg in segments)
-        if needs_translation:
-            translator = TranslationService(config=config)
-            segments = translator.translate_segments(segments)
-        else:
-            print("✅ Using existing translations")
-
-        # Apply text replacement rules ONLY if overwrite_segments is True
-        # (because rules might have changed since last run)
-        if overwrite_segments:
-            text_rules = dubbing_rules.get("textRules", [])
-            if text_rules:
-                print("📝 Applying text replacement rules...")
-                for segment in segments:
-                    if segment.translated_text:
-                        segment.translated_text = apply_text_rules(
-                            segment.translated_text, 
-                            config["target_language"], 
-                            text_rules
-                        )
-
-        print("🧠 Synthesizing transcript chunks via Kokoro...")
-        audio_paths = []
-        text_chunks_to_audio(segments, audio_dir, audio_paths)
-
-        if overwrite_segments:
-            # Always save segments after synthesis (to update audio_file paths)
-            with open(segment_data_path, "w", encoding="utf-8") as f:
-                json.dump([asdict(seg) for seg in segments], f, indent=2, ensure_ascii=False)
-            print(f"📝 Updated segment metadata saved to {segment_data_path}")
-
-    final_audio_path = os.path.join(audio_dir, f"{video_id}_dubbed.mp3")
-
-    # Add loose sync settings to config
-    config.update(update_config_for_loose_sync())
-
-    # Enhanced audio creation with loose sync and background audio
-    audio_settings = dubbing_rules.get("audioSettings", {})
-    if original_video_path and segments:
         try:
-            # Get total video duration
-            result = subprocess.run([
-                "ffprobe", "-v", "quiet", "-show_entries", "format=duration",
-                "-of", "csv=p=0", original_video_path
-            ], capture_output=True, text=True, check=True)
-            total_duration = float(result.stdout.strip())
-            
-            # Use enhanced audio creation with loose sync and background audio
-            if create_enhanced_audio_track_with_loose_sync(segments, final_audio_path, total_duration, audio_settings, background_audio_path):
-                print(f"🎬 Enhanced audio with loose sync and background saved to {final_audio_path}")
-
-                # Apply audio effects
-                preset = config.get("audio_effects_preset", "voice")
-                if preset != "off":
-                    effects_audio_path = os.path.join(audio_dir, f"{video_id}_dubbed_effects.mp3")
-                    if apply_audio_effects(final_audio_path, effects_audio_path, preset):
-                        final_audio_path = effects_audio_path
+            if audio_synthesis_exists:
+                print("🎯 Reusing existing audio synthesis")
+                audio_paths = existing_audio_paths
             else:
-                # Fallback to simple concatenation
+                # Need to translate and/or synthesize
+                print("🔄 Processing segments (translation and/or synthesis needed)")
+        
+                # Only translate if we don't have translations
+                needs_translation = any(not seg.translated_text for seg in segments)
+                if needs_translation:
+                    from util.translation_service import TranslationService
+                    translator = TranslationService(config=config)
+                    segments = translator.translate_segments(segments)
+                else:
+                    print("✅ Using existing translations")
+
+                # Apply text replacement rules ONLY if overwrite_segments is True
+                # (because rules might have changed since last run)
+                if overwrite_segments:
+                    text_rules = dubbing_rules.get("textRules", [])
+                    if text_rules:
+                        print("📝 Applying text replacement rules...")
+                        text_rules = compile_text_rules(text_rules, config["target_language"])
+                        for segment in segments:
+                            if segment.translated_text:
+                                segment.translated_text = apply_text_rules(
+                                    segment.translated_text, 
+                                    config["target_language"], 
+                                    text_rules
+                                )
+
+                print("🧠 Synthesizing transcript chunks via Kokoro...")
+                from util.text_chunks_to_audio import text_chunks_to_audio
+                audio_paths = []
+                text_chunks_to_audio(segments, audio_dir, audio_paths)
+        finally:
+            # Single write once all segment mutations are done; still runs if synthesis fails midway
+            if overwrite_segments:
+                save_segments(segment_data_path, segments)
+                print(f"📝 Updated segment metadata saved to {segment_data_path}")
+
+        # Wait for stem separation before building the final track
+        if stem_future is not None and not stem_future.result():
+            print("⚠️ Stem separation failed, proceeding without background audio")
+            background_audio_path = None
+
+        # Mixing, effects and the concat fallback stay in mp3 (or WAV); the final codec is applied once, at the end
+        mix_audio_ext = mix_audio_extension()
+        final_audio_path = os.path.join(audio_dir, f"{video_id}_dubbed.{mix_audio_ext}")
+        # The concat fallback stream-copies the mp3 chunks, so it always writes mp3
+        concat_audio_path = os.path.join(audio_dir, f"{video_id}_dubbed.mp3")
+
+        # Add loose sync settings to config
+        config.update(update_config_for_loose_sync())
+
+        # Enhanced audio creation with loose sync and background audio
+        audio_settings = dubbing_rules.get("audioSettings", {})
+        if original_video_path and segments:
+            try:
+                # Get total video duration
+                total_duration = video_duration if video_duration is not None else probe_duration(original_video_path)
+            
+                # Use enhanced audio creation with loose sync and background audio
+                if create_enhanced_audio_track_with_loose_sync(segments, final_audio_path, total_duration, audio_settings, background_audio_path):
+                    print(f"🎬 Enhanced audio with loose sync and background saved to {final_audio_path}")
+
+                    # Apply audio effects
+                    preset = config.get("audio_effects_preset", "voice")
+                    if preset != "off":
+                        effects_audio_path = os.path.join(audio_dir, f"{video_id}_dubbed_effects.{mix_audio_ext}")
+                        if apply_audio_effects(final_audio_path, effects_audio_path, preset):
+                            final_audio_path = effects_audio_path
+                else:
+                    # Fallback to simple concatenation
+                    final_audio_path = concat_audio_path
+                    concatenate_audio(audio_paths, final_audio_path)
+                    print(f"🎬 Final audio saved to {final_audio_path}")
+            except Exception as e:
+                print(f"⚠️ Enhanced audio creation failed: {e}")
+                final_audio_path = concat_audio_path
                 concatenate_audio(audio_paths, final_audio_path)
                 print(f"🎬 Final audio saved to {final_audio_path}")
-        except Exception as e:
-            print(f"⚠️ Enhanced audio creation failed: {e}")
+        else:
+            # Use simple concatenation
+            final_audio_path = concat_audio_path
             concatenate_audio(audio_paths, final_audio_path)
             print(f"🎬 Final audio saved to {final_audio_path}")
-    else:
-        # Use simple concatenation
-        concatenate_audio(audio_paths, final_audio_path)
-        print(f"🎬 Final audio saved to {final_audio_path}")
 
-    # Use the actual downloaded video path
-    dubbed_video_path = os.path.join(audio_dir, f"{video_id}_dubbed_video.mp4")
-    merge_audio_with_video(original_video_path, final_audio_path, dubbed_video_path)
+        # Use the actual downloaded video path
+        dubbed_video_path = os.path.join(audio_dir, f"{video_id}_dubbed_video.mp4")
+        # Make sure the ./input copy has landed before we finish
+        if copy_future is not None:
+            copy_future.result()
+        final_audio_path = encode_final_audio(final_audio_path)
+        merge_audio_with_video(original_video_path, final_audio_path, dubbed_video_path)
+    finally:
+        # Early returns and errors drop queued work instead of waiting on it; a running demucs still finishes
+        background_executor.shutdown(wait=False, cancel_futures=True)
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
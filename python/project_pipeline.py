@@ -6,21 +6,50 @@ Handles step-by-step execution with project persistence
 
 import os
 import sys
-import json
 import argparse
 import subprocess
 import tempfile
 from pathlib import Path
-from typing import Dict, Any, Optional, List
-from urllib.parse import urlparse, parse_qs
-from dataclasses import asdict
+from typing import Dict, Any, Optional, List, Sequence
+from dataclasses import asdict, is_dataclass
 import logging
-import re
+import logging.handlers
+import queue
+import atexit
+import functools
+import collections
+from concurrent.futures import ThreadPoolExecutor
 
 # Setup logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Records are queued and written to stderr by a listener thread, so steps never block on the stream;
+# atexit drains the queue before the process ends
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+_log_queue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_handler)
+logging.root.setLevel(logging.INFO)
+logging.root.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
+from util.extract_video_id import extract_video_id
+from util.json_io import load_json, loads_json, dumps_json
+from util.write_atomic import write_atomic
+from util.stderr_tail import stderr_tail
+from structs.FileRef import FileRef
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
 # Import the original pipeline components
 try:
     from util.download_video import download_video
@@ -33,98 +62,412 @@ try:
     from util.concatenate_audio import concatenate_audio
     from util.audio_effects import apply_audio_effects
     from rules.apply_segment_rules import apply_segment_rules
-    from rules.apply_text_rules import apply_text_rules
+    from rules.apply_text_rules import apply_text_rules, compile_text_rules
     from rules.load_dubbing_rules import load_dubbing_rules
     from checks.check_files_exist import check_audio_synthesis_exists
     from checks.load_existing_segments_if_available import load_existing_segments_if_available
     from sync.create_enhanced_audio_track_with_loose_sync import create_enhanced_audio_track_with_loose_sync
     from structs.DubSegment import DubSegment
+    from util.final_audio_codec import mix_audio_extension, encode_final_audio
+    from util.probe_duration import probe_duration
     from config import config
 except ImportError as e:
     logger.warning(f"Could not import original pipeline components: {e}")
     logger.info("Running in standalone mode - some features may be limited")
 
-def extract_video_id(url_or_id: str) -> str:
-    """Extract YouTube video ID from URL or return ID if already provided"""
-    # If it's already a YouTube ID (11 chars, alphanumeric, typical format)
-    if re.match(r"^[\w-]{11}$", url_or_id):
-        return url_or_id
+# Concurrent file creates when writing placeholder audio files
+PLACEHOLDER_WORKERS = 16
+
+# Subdirectories created in every project
+PROJECT_SUBDIRS = ("input", "transcripts", "audio", "output")
+
+# Pipeline settings every step depends on; editing either makes completed steps run again
+SETTINGS_FILES = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.py"), ".env"]
 
-    # Try parsing the URL
-    parsed = urlparse(url_or_id)
-    if parsed.hostname in ("www.youtube.com", "youtube.com"):
-        query = parse_qs(parsed.query)
-        return query.get("v", [None])[0]
-    elif parsed.hostname == "youtu.be":
-        return parsed.path.lstrip("/")
-    else:
-        return None  # Invalid format
+# Raw bytes of each project.json keyed by path, valid while the file's mtime is unchanged.
+# Saves store the payload they just serialized, so the next load parses it without touching disk.
+_CONFIG_CACHE: Dict[str, tuple] = {}
+
+@functools.lru_cache(maxsize=8)
+def load_translation_memory(path: str, mtime_ns: int) -> Dict[str, str]:
+    """Parse a translation memory once per process; mtime_ns in the key drops stale entries"""
+    return load_json(path)
+
+def segment_from_data(data: Any) -> Any:
+    """Build a DubSegment from a segments.json entry, passing non-dict entries through"""
+    if not isinstance(data, dict):
+        return data
+    # Straight-line field assignment; a missing required field raises TypeError
+    return DubSegment.from_dict(data)
+
+def segments_to_data(segments: List[Any]) -> List[Any]:
+    """Convert DubSegment objects to segments.json entries, passing dicts through"""
+    return [
+        seg.to_dict() if hasattr(seg, 'to_dict') else asdict(seg) if is_dataclass(seg) else seg
+        for seg in segments
+    ]
 
 class ProjectPipeline:
     def __init__(self, project_dir: str):
         self.project_dir = Path(project_dir)
         self.project_config_path = self.project_dir / "project.json"
+        # Step status changes are appended here first and folded into project.json on flush
+        self.project_log_path = self.project_dir / "project.log.jsonl"
         self.project_config = self.load_project_config()
         
-        # Setup output directories
-        self.input_dir = self.project_dir / "input"
-        self.transcripts_dir = self.project_dir / "transcripts"
-        self.audio_dir = self.project_dir / "audio"
-        self.output_dir = self.project_dir / "output"
+        # Writes are deferred to flush() (run on leaving a `with` block), so a step writes each file once
+        self._config_dirty = False
+        # Set while project.json snapshots are deferred to the end of a run; only then are step records logged
+        self._snapshot_deferred = False
+        self._pending_segments: Dict[str, Any] = {}
+        # ((rules path, mtime_ns), rules, compiled text rules by language) from the last rules load
+        self._dubbing_rules: Optional[tuple] = None
+        # Segment data this instance last wrote, keyed by path, as (mtime_ns, data), so the next step skips the parse
+        self._segments_cache: Dict[str, tuple] = {}
+        # (step, result) of a successful step, stamped into stepCache on flush
+        self._completed_step: Optional[tuple] = None
         
-        # Ensure directories exist
-        for dir_path in [self.input_dir, self.transcripts_dir, self.audio_dir, self.output_dir]:
-            dir_path.mkdir(exist_ok=True)
-            
-        # Load environment variables
-        self.load_environment()
+        # Every step reads the segments file, so keep its directory as a plain string for os.path calls
+        self.transcripts_dir_str = os.path.join(project_dir, "transcripts")
+        
+        # Ensure directories exist, listing the project once and only creating what's missing
+        with os.scandir(project_dir) as entries:
+            existing = {entry.name for entry in entries if entry.is_dir()}
+        for name in PROJECT_SUBDIRS:
+            if name not in existing:
+                try:
+                    os.mkdir(os.path.join(project_dir, name))
+                except FileExistsError:
+                    pass
     
-    def load_environment(self):
-        """Load environment variables and update config"""
-        try:
-            from dotenv import load_dotenv
-            load_dotenv()
-            logger.info("✅ Loaded environment variables from .env file")
-        except ImportError:
-            logger.warning("⚠️ python-dotenv not installed. Install with: pip install python-dotenv")
-        except Exception as e:
-            logger.warning(f"⚠️ Could not load .env file: {e}")
-
-        # Update config with environment variables if they exist
-        env_hf_token = os.getenv("HF_TOKEN") or os.getenv("HUGGINGFACE_TOKEN")
-        if env_hf_token and 'config' in globals():
-            config["hf_token"] = env_hf_token
-            logger.info("🔑 HF token loaded from environment")
-            
-            # Enable diarization if HF token is available
-            if config.get("hf_token") and config["hf_token"] != "your_huggingface_token_here":
-                config["enable_diarization"] = True
-                logger.info("🎭 Diarization automatically enabled (HF token found)")
+    # Output directories, built as Path objects only by the steps that use them
+    @functools.cached_property
+    def input_dir(self) -> Path:
+        return self.project_dir / "input"
+    
+    @functools.cached_property
+    def transcripts_dir(self) -> Path:
+        return Path(self.transcripts_dir_str)
+    
+    @functools.cached_property
+    def audio_dir(self) -> Path:
+        return self.project_dir / "audio"
+    
+    @functools.cached_property
+    def output_dir(self) -> Path:
+        return self.project_dir / "output"
     
     def load_project_config(self) -> Dict[str, Any]:
         """Load project configuration from project.json"""
-        if not self.project_config_path.exists():
+        key = str(self.project_config_path)
+        try:
+            mtime_ns = os.stat(key).st_mtime_ns
+        except FileNotFoundError:
             raise FileNotFoundError(f"Project config not found: {self.project_config_path}")
         
-        with open(self.project_config_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        cached = _CONFIG_CACHE.get(key)
+        if cached is None or cached[0] != mtime_ns:
+            with open(key, 'rb') as f:
+                cached = (mtime_ns, f.read())
+            _CONFIG_CACHE[key] = cached
+        
+        # Parsing the cached bytes hands out a fresh object, so step mutations don't leak into the cache
+        project_config = loads_json(cached[1])
+        self.replay_step_log(project_config)
+        return project_config
+    
+    def replay_step_log(self, project_config: Dict[str, Any]):
+        """Apply step records that were logged but not yet folded into project.json"""
+        try:
+            with open(self.project_log_path, 'rb') as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return
+        
+        for line in lines:
+            try:
+                record = loads_json(line)
+            except ValueError:
+                continue  # Torn final line from a crash mid-append
+            project_config.setdefault("completedSteps", {})[record["step"]] = record["completed"]
+            project_config["lastModified"] = record["ts"]
     
     def save_project_config(self):
         """Save updated project configuration"""
-        with open(self.project_config_path, 'w', encoding='utf-8') as f:
-            json.dump(self.project_config, f, indent=2, ensure_ascii=False)
+        key = str(self.project_config_path)
+        payload = dumps_json(self.project_config)
+        cached = _CONFIG_CACHE.get(key)
+        if cached is not None and cached[1] == payload:
+            # Skip the write if the file on disk is still the one these bytes came from
+            try:
+                if os.stat(key).st_mtime_ns == cached[0]:
+                    return
+            except FileNotFoundError:
+                pass
+        
+        # Readers (the Go host) never see a partial file, and a crash leaves the old one intact
+        write_atomic(key, payload)
+        _CONFIG_CACHE[key] = (os.stat(key).st_mtime_ns, payload)
     
     def update_step_completion(self, step: str, completed: bool = True):
         """Update completion status for a pipeline step"""
         if "completedSteps" not in self.project_config:
             self.project_config["completedSteps"] = {}
         
+        timestamp = self.get_current_timestamp()
         self.project_config["completedSteps"][step] = completed
-        self.project_config["lastModified"] = self.get_current_timestamp()
-        self.save_project_config()
+        self.project_config["lastModified"] = timestamp
+        self._config_dirty = True
+        
+        # One short sequential append makes the change durable until the deferred snapshot rewrites project.json
+        if self._snapshot_deferred:
+            record = dumps_json({"step": step, "completed": completed, "ts": timestamp}, indent=False)
+            with open(self.project_log_path, 'ab') as f:
+                f.write(record + b'\n')
+                os.fsync(f.fileno())
         
         logger.info(f"✅ Step '{step}' marked as {'completed' if completed else 'incomplete'}")
 
+    def load_segments(self, segments_path: str) -> List[Any]:
+        """Load a segments file, as DubSegment objects when the class is available"""
+        cached = self._segments_cache.get(segments_path)
+        if cached is not None and 'DubSegment' in globals():
+            try:
+                if os.stat(segments_path).st_mtime_ns == cached[0]:
+                    # Fresh objects are built from the cached dicts, so step mutations don't reach the cache
+                    return [segment_from_data(data) for data in cached[1]]
+            except FileNotFoundError:
+                pass
+        
+        segments = self.load_segments_parquet(segments_path)
+        if segments is not None:
+            if 'DubSegment' in globals():
+                for i, data in enumerate(segments):
+                    segments[i] = segment_from_data(data)
+            return segments
+        
+        if 'DubSegment' not in globals():
+            return load_json(segments_path)
+        
+        # Stream items straight into segments so the parsed dicts never all exist at once
+        if ijson is not None:
+            with open(segments_path, 'rb') as f:
+                return [segment_from_data(data) for data in ijson.items(f, 'item', use_float=True)]
+        
+        segments = load_json(segments_path)
+        for i, data in enumerate(segments):
+            segments[i] = segment_from_data(data)
+        return segments
+    
+    def load_segments_parquet(self, segments_path: str) -> Optional[List[Dict[str, Any]]]:
+        """Read the .parquet sidecar of a segments file, or None if missing or older than the JSON"""
+        if pq is None:
+            return None
+        
+        parquet_path = Path(segments_path).with_suffix('.parquet')
+        try:
+            # A segments file edited after the sidecar was written makes the sidecar stale
+            if os.stat(parquet_path).st_mtime_ns < os.stat(segments_path).st_mtime_ns:
+                return None
+            rows = pq.read_table(parquet_path).to_pylist()
+        except (OSError, pa.ArrowException):
+            return None
+        
+        # Arrow fills keys missing from a row with nulls; drop them so field defaults apply
+        return [{key: value for key, value in row.items() if value is not None} for row in rows]
+    
+    def save_segments_parquet(self, segments_path: str, segment_data: List[Any]):
+        """Write a zstd-compressed Parquet copy of a segments file next to it"""
+        parquet_path = Path(segments_path).with_suffix('.parquet')
+        tmp_path = f"{parquet_path}.tmp"
+        try:
+            table = pa.Table.from_pylist(segment_data)
+            pq.write_table(table, tmp_path, compression='zstd', use_dictionary=True)
+        except (OSError, pa.ArrowException) as e:
+            # Leave the JSON as the only copy; any old sidecar is now older than it and ignored
+            logger.warning(f"⚠️ Could not write Parquet segments: {e}")
+            return
+        os.replace(tmp_path, parquet_path)
+    
+    def save_segments(self, segments_path: str, segment_data: List[Any]):
+        """Queue the segments file to be written on flush"""
+        self._pending_segments[segments_path] = segment_data
+    
+    def up_to_date_steps_before(self, step: str) -> List[str]:
+        """Steps ahead of step that are up to date, checked before step runs and rewrites shared files"""
+        return [s for s in PIPELINE_STEPS[:PIPELINE_STEPS.index(step)] if self.is_step_up_to_date(s)]
+    
+    def flush(self, snapshot: bool = True, stamp_steps: Sequence[str] = ()):
+        """Write deferred segments files and, with snapshot, project config changes.
+        
+        stamp_steps (from up_to_date_steps_before) get their signatures retaken alongside a completed
+        step's, so files it rewrote don't make them look stale.
+        """
+        for path, segment_data in self._pending_segments.items():
+            write_atomic(path, dumps_json(segment_data))
+            self._segments_cache[path] = (os.stat(path).st_mtime_ns, segment_data)
+            
+            # The sidecar is written after the JSON so its mtime marks it as current
+            if pq is not None:
+                self.save_segments_parquet(path, segment_data)
+        self._pending_segments.clear()
+        
+        # Signatures are taken after the segments are written, so they describe what the step left behind
+        if self._completed_step is not None:
+            step, result = self._completed_step
+            step_cache = self.project_config.setdefault("stepCache", {})
+            for earlier_step in stamp_steps:
+                step_cache[earlier_step]["signature"] = self.step_signature(earlier_step)
+            step_cache[step] = {"signature": self.step_signature(step), "result": result}
+            self._completed_step = None
+            self._config_dirty = True
+        
+        # Without a snapshot, step status stays in the log and the rest in memory until a later flush
+        if self._config_dirty and snapshot:
+            self.save_project_config()
+            self._config_dirty = False
+            
+            # project.json now holds every logged record, so the log can be compacted away
+            try:
+                self.project_log_path.unlink()
+            except FileNotFoundError:
+                pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.flush()
+    
+    def get_media_path(self) -> Optional[str]:
+        """Path of the project's source media, linked or copied, if one is referenced"""
+        file_refs = self.project_config.get("fileReferences", {})
+        file_ref = file_refs.get("videoFile") or file_refs.get("audioFile")
+        if not file_ref:
+            return None
+        if file_ref.get("isLinked"):
+            return file_ref["path"]
+        return os.path.join(self.project_dir, file_ref["path"])
+    
+    def step_files(self, step: str) -> tuple:
+        """(inputs, outputs) paths whose state decides whether a step has to run again"""
+        video_id = self.get_video_id()
+        segments_path = self.get_segments_path(video_id)
+        media_path = self.get_media_path()
+        rules_path = config.get("rules_file", "dubbing-rules.json") if 'config' in globals() else None
+        file_refs = self.project_config.get("fileReferences", {})
+        
+        if step == "download":
+            return [], [media_path]
+        elif step == "transcribe":
+            return [media_path], [segments_path]
+        elif step == "translate":
+            memory_path = os.path.join(self.project_dir, "translations", f"{self.get_target_language()}.json")
+            return [rules_path, memory_path], [segments_path]
+        elif step == "synthesize":
+            return [rules_path], [segments_path, str(self.audio_dir)]
+        elif step == "combine":
+            final_paths = [
+                os.path.join(self.project_dir, file_refs[key]) if file_refs.get(key) else None
+                for key in ("finalAudio", "finalVideo")
+            ]
+            return [rules_path, media_path, segments_path, str(self.audio_dir)], final_paths
+        raise ValueError(f"Unknown pipeline step: {step}")
+    
+    def step_signature(self, step: str) -> Dict[str, Any]:
+        """Size and mtime of every file a step depends on, plus the project settings it reads"""
+        inputs, outputs = self.step_files(step)
+        files = {}
+        for path in SETTINGS_FILES + inputs + outputs:
+            if path is None or path in files:
+                continue
+            try:
+                st = os.stat(path)
+                files[path] = [st.st_size, st.st_mtime_ns]
+            except FileNotFoundError:
+                files[path] = None
+        
+        settings = [self.project_config.get(key) for key in ("sourceUrl", "videoId", "targetLanguage")]
+        return {"files": files, "settings": settings}
+    
+    def is_step_up_to_date(self, step: str) -> bool:
+        """True if a completed step's outputs exist and nothing it depends on changed since it ran"""
+        if not self.project_config.get("completedSteps", {}).get(step):
+            return False
+        
+        cached = self.project_config.get("stepCache", {}).get(step)
+        if not cached:
+            return False
+        
+        # The signature stats every output anyway, so read existence off it rather than stat twice
+        _, outputs = self.step_files(step)
+        signature = self.step_signature(step)
+        if any(path is None or signature["files"].get(path) is None for path in outputs):
+            return False
+        
+        return cached["signature"] == signature
+    
+    def cached_step_result(self, step: str) -> Dict[str, Any]:
+        """Result recorded when an up-to-date step last ran"""
+        result = dict(self.project_config["stepCache"][step]["result"])
+        result["upToDate"] = True
+        return result
+    
+    def record_step_result(self, step: str, result: Dict[str, Any]):
+        """Remember a successful step's result so an unchanged rerun can be skipped"""
+        if result.get("success"):
+            self._completed_step = (step, result)
+    
+    def create_placeholder_files(self, directory: str, names: List[str]):
+        """Create empty files, skipping those that already exist"""
+        # One directory listing replaces a utime+open+close per file on reruns
+        with os.scandir(directory) as entries:
+            existing = {entry.name for entry in entries}
+        
+        flags = os.O_CREAT | os.O_WRONLY | getattr(os, 'O_CLOEXEC', 0)
+        dir_prefix = os.path.join(directory, "")
+        missing = [dir_prefix + name for name in names if name not in existing]
+        
+        def create(path: str):
+            os.close(os.open(path, flags, 0o644))
+        
+        # Creates are independent, so keep several in flight to hide per-file latency on network mounts
+        if len(missing) > 1:
+            with ThreadPoolExecutor(max_workers=min(PLACEHOLDER_WORKERS, len(missing))) as executor:
+                list(executor.map(create, missing))
+        else:
+            for path in missing:
+                create(path)
+    
+    def get_dubbing_rules(self) -> Dict[str, Any]:
+        """load_dubbing_rules(), re-read only when the rules file changes"""
+        rules_path = config.get("rules_file", "dubbing-rules.json")
+        try:
+            stamp = (rules_path, os.stat(rules_path).st_mtime_ns)
+        except FileNotFoundError:
+            stamp = (rules_path, None)
+        
+        if self._dubbing_rules is None or self._dubbing_rules[0] != stamp:
+            self._dubbing_rules = (stamp, load_dubbing_rules(), {})
+        return self._dubbing_rules[1]
+    
+    def get_compiled_text_rules(self, target_lang: str):
+        """Text rules for a language, compiled once per rules load"""
+        dubbing_rules = self.get_dubbing_rules()
+        compiled = self._dubbing_rules[2]
+        if target_lang not in compiled:
+            compiled[target_lang] = compile_text_rules(dubbing_rules.get("textRules", []), target_lang)
+        return compiled[target_lang]
+    
+    def get_translation_memory(self, target_lang: str) -> Dict[str, str]:
+        """Load translations/<lang>.json from the project, or an empty memory if there is none"""
+        memory_path = os.path.join(self.project_dir, "translations", f"{target_lang}.json")
+        try:
+            mtime_ns = os.stat(memory_path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        return load_translation_memory(memory_path, mtime_ns)
+    
     def get_current_timestamp(self) -> str:
         """Get current timestamp in ISO 8601 format"""
         from datetime import datetime
@@ -134,6 +477,10 @@ class ProjectPipeline:
         """Get video ID from project config"""
         return self.project_config.get("videoId", "unknown")
     
+    def get_segments_path(self, video_id: str) -> str:
+        """Path of the segments file shared by the transcribe, translate, synthesize and combine steps"""
+        return os.path.join(self.transcripts_dir_str, f"{video_id}_segments.json")
+    
     def get_target_language(self) -> str:
         """Get target language from project config"""
         return self.project_config.get("targetLanguage", "es")
@@ -174,12 +521,11 @@ class ProjectPipeline:
                     
                     # Update file reference in project config
                     video_filename = os.path.basename(video_path)
-                    self.project_config["fileReferences"]["videoFile"] = {
-                        "path": f"input/{video_filename}",
-                        "isLinked": False,
-                        "size": os.path.getsize(video_path) if os.path.exists(video_path) else 0,
-                        "lastModified": self.get_current_timestamp()
-                    }
+                    try:
+                        video_ref = FileRef.from_file(f"input/{video_filename}", False, video_path)
+                    except FileNotFoundError:
+                        video_ref = FileRef(f"input/{video_filename}", False, 0, self.get_current_timestamp())
+                    self.project_config["fileReferences"]["videoFile"] = video_ref.to_dict()
                     
                     result = {
                         "success": True,
@@ -195,21 +541,24 @@ class ProjectPipeline:
                     cmd = [
                         "yt-dlp",
                         "-f", "best[ext=mp4]",
+                        "-N", "4",  # concurrent fragment downloads
                         "-o", str(video_path),
                         source_url
                     ]
                     
-                    subprocess.run(cmd, check=True, capture_output=True)
+                    # Progress output is discarded; only the tail of stderr is kept for the error message
+                    with subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE) as proc:
+                        stderr_lines = collections.deque(proc.stderr, maxlen=50)
+                    if proc.returncode:
+                        error = subprocess.CalledProcessError(proc.returncode, cmd, stderr=b"".join(stderr_lines))
+                        raise RuntimeError(f"yt-dlp failed: {stderr_tail(error)}") from error
                     
-                    if not video_path.exists():
+                    try:
+                        video_ref = FileRef.from_file(f"input/{video_filename}", False, video_path)
+                    except FileNotFoundError:
                         raise Exception("Video download failed")
                     
-                    self.project_config["fileReferences"]["videoFile"] = {
-                        "path": f"input/{video_filename}",
-                        "isLinked": False,
-                        "size": video_path.stat().st_size,
-                        "lastModified": self.get_current_timestamp()
-                    }
+                    self.project_config["fileReferences"]["videoFile"] = video_ref.to_dict()
                     
                     result = {
                         "success": True,
@@ -230,7 +579,9 @@ class ProjectPipeline:
                 if file_ref["isLinked"]:
                     # File is still linked, verify it exists
                     source_path = file_ref["path"]
-                    if not os.path.exists(source_path):
+                    try:
+                        file_ref.update(FileRef.from_file(source_path, True, source_path).to_dict())
+                    except FileNotFoundError:
                         raise FileNotFoundError(f"Linked file not found: {source_path}")
                     
                     result = {
@@ -241,15 +592,17 @@ class ProjectPipeline:
                     }
                 else:
                     # File is copied to project
-                    file_path = self.project_dir / file_ref["path"]
-                    if not file_path.exists():
+                    file_path = os.path.join(self.project_dir, file_ref["path"])
+                    try:
+                        file_ref.update(FileRef.from_file(file_ref["path"], False, file_path).to_dict())
+                    except FileNotFoundError:
                         raise FileNotFoundError(f"Project file not found: {file_path}")
                     
                     result = {
                         "success": True,
-                        "videoPath": str(file_path),
+                        "videoPath": file_path,
                         "videoId": self.get_video_id(),
-                        "message": f"✅ Using project file: {file_path.name}"
+                        "message": f"✅ Using project file: {os.path.basename(file_path)}"
                     }
             else:
                 raise ValueError(f"Unknown source type: {source_type}")
@@ -302,101 +655,14 @@ class ProjectPipeline:
                 segments = transcript
             
             # Save segments to project
-            segments_path = self.transcripts_dir / f"{video_id}_segments.json"
+            segments_path = self.get_segments_path(video_id)
             
             # Convert segments to dict format if they're DubSegment objects
-            if segments and hasattr(segments[0], '__dict__'):
-                segment_data = [asdict(seg) if hasattr(asdict, '__call__') and hasattr(seg, '__dict__') 
-                              else seg.__dict__ for seg in segments]
-            else:
-                segment_data = segments
-            
-            with open(segments_path, 'w', encoding='utf-8') as f:
-                json.dump(segment_data, f, indent=2, ensure_ascii=False)
+            segment_data = segments_to_data(segments)
+            self.save_segments(segments_path, segment_data)
             
             # Update project config
-            self.project_config["fileReferences"]["finalAudio"] = f"audio/{final_audio_path.name}"
-            self.project_config["fileReferences"]["finalVideo"] = f"output/{final_video_path.name}"
-            
-            result = {
-                "success": True,
-                "finalVideoPath": str(final_video_path),
-                "finalAudioPath": str(final_audio_path),
-                "videoDuration": total_duration,
-                "message": f"✅ Final video created: {final_video_path.name}"
-            }
-            
-            self.update_step_completion("combine", True)
-            return result
-            
-        except Exception as e:
-            logger.error(f"❌ Final assembly step failed: {e}")
-            self.update_step_completion("combine", False)
-            return {
-                "success": False,
-                "error": str(e),
-                "message": f"❌ Final assembly failed: {e}"
-            }
-
-def setup_project_config():
-    """Setup project-specific config overrides"""
-    if 'config' not in globals():
-        return
-        
-    # These will be overridden by the project pipeline as needed
-    project_config_defaults = {
-        "force_whisperx": True,
-        "audio_effects_preset": "voice",
-        "target_language": "es"
-    }
-    
-    for key, value in project_config_defaults.items():
-        if key not in config:
-            config[key] = value
-
-def main():
-    parser = argparse.ArgumentParser(description="VoiceWeave Studio Project Pipeline")
-    parser.add_argument("project_dir", help="Project directory path")
-    parser.add_argument("step", choices=["download", "transcribe", "translate", "synthesize", "combine"], 
-                       help="Pipeline step to execute")
-    
-    args = parser.parse_args()
-    
-    try:
-        # Setup config defaults
-        setup_project_config()
-        
-        pipeline = ProjectPipeline(args.project_dir)
-        
-        # Execute the requested step
-        if args.step == "download":
-            result = pipeline.step_download()
-        elif args.step == "transcribe":
-            result = pipeline.step_transcribe()
-        elif args.step == "translate":
-            result = pipeline.step_translate()
-        elif args.step == "synthesize":
-            result = pipeline.step_synthesize()
-        elif args.step == "combine":
-            result = pipeline.step_combine()
-        
-        # Output result as JSON for Go to parse
-        print(json.dumps(result, indent=2))
-        
-        # Exit with appropriate code
-        sys.exit(0 if result["success"] else 1)
-        
-    except Exception as e:
-        error_result = {
-            "success": False,
-            "error": str(e),
-            "message": f"❌ Pipeline failed: {e}"
-        }
-        print(json.dumps(error_result, indent=2))
-        sys.exit(1)
-
-if __name__ == "__main__":
-    main()fileReferences"]["segmentsFile"] = f"transcripts/{video_id}_segments.json"
+            self.project_config["fileReferences"]["segmentsFile"] = f"transcripts/{video_id}_segments.json"
             
             # Restore original config
             config["transcript_output_dir"] = original_transcript_dir
@@ -404,7 +670,7 @@ if __name__ == "__main__":
             result = {
                 "success": True,
                 "segmentsCount": len(segments),
-                "segmentsPath": str(segments_path),
+                "segmentsPath": segments_path,
                 "message": f"✅ Generated {len(segments)} transcript segments"
             }
             
@@ -429,36 +695,13 @@ if __name__ == "__main__":
             target_lang = self.get_target_language()
             
             # Load segments
-            segments_path = self.transcripts_dir / f"{video_id}_segments.json"
-            if not segments_path.exists():
+            segments_path = self.get_segments_path(video_id)
+            # Convert back to DubSegment objects if the class is available; opening is the existence check
+            try:
+                segments = self.load_segments(segments_path)
+            except FileNotFoundError:
                 raise FileNotFoundError("Segments file not found. Run transcription first.")
             
-            with open(segments_path, 'r', encoding='utf-8') as f:
-                segment_data = json.load(f)
-            
-            # Convert back to DubSegment objects if the class is available
-            if 'DubSegment' in globals():
-                segments = []
-                for data in segment_data:
-                    if isinstance(data, dict):
-                        # Create DubSegment from dict
-                        segment = DubSegment(
-                            start=data.get('start', 0),
-                            end=data.get('end', 0),
-                            original_text=data.get('original_text', ''),
-                            translated_text=data.get('translated_text', ''),
-                            target_duration=data.get('target_duration', 0)
-                        )
-                        # Copy any additional attributes
-                        for key, value in data.items():
-                            if hasattr(segment, key):
-                                setattr(segment, key, value)
-                        segments.append(segment)
-                    else:
-                        segments.append(data)
-            else:
-                segments = segment_data
-            
             # Check if we need translation
             needs_translation = True
             if isinstance(segments[0], dict):
@@ -472,31 +715,41 @@ if __name__ == "__main__":
                 segments = translator.translate_segments(segments)
                 logger.info(f"✅ Translated segments using TranslationService")
             elif needs_translation:
-                # Fallback translation (placeholder)
-                logger.warning("TranslationService not available, using placeholder translation")
-                for i, segment in enumerate(segments):
-                    if isinstance(segment, dict):
+                # Fallback translation: project translation memory, else a placeholder
+                logger.warning("TranslationService not available, using translation memory or placeholder translation")
+                translation_memory = self.get_translation_memory(target_lang)
+                lookup = translation_memory.get
+                prefix = f"[{target_lang.upper()}] "
+                # Segments are all dicts or all objects, so branch once outside the loop
+                if isinstance(segments[0], dict):
+                    for segment in segments:
                         if not segment.get('translated_text', ''):
-                            segment['translated_text'] = f"[{target_lang.upper()}] {segment.get('original_text', '')}"
-                    else:
+                            original_text = segment.get('original_text', '')
+                            translated_text = lookup(original_text)
+                            segment['translated_text'] = translated_text if translated_text is not None else prefix + original_text
+                else:
+                    for segment in segments:
                         if not getattr(segment, 'translated_text', ''):
-                            segment.translated_text = f"[{target_lang.upper()}] {getattr(segment, 'original_text', '')}"
+                            original_text = getattr(segment, 'original_text', '')
+                            translated_text = lookup(original_text)
+                            segment.translated_text = translated_text if translated_text is not None else prefix + original_text
             
             # Apply text replacement rules if available
             if 'load_dubbing_rules' in globals() and 'apply_text_rules' in globals():
-                dubbing_rules = load_dubbing_rules()
-                text_rules = dubbing_rules.get("textRules", [])
-                if text_rules:
+                dubbing_rules = self.get_dubbing_rules()
+                if dubbing_rules.get("textRules"):
                     logger.info("📝 Applying text replacement rules...")
-                    for segment in segments:
-                        if isinstance(segment, dict):
+                    text_rules = self.get_compiled_text_rules(target_lang)
+                    if isinstance(segments[0], dict):
+                        for segment in segments:
                             if segment.get('translated_text'):
                                 segment['translated_text'] = apply_text_rules(
                                     segment['translated_text'], 
                                     target_lang, 
                                     text_rules
                                 )
-                        else:
+                    else:
+                        for segment in segments:
                             if getattr(segment, 'translated_text', ''):
                                 segment.translated_text = apply_text_rules(
                                     segment.translated_text, 
@@ -505,20 +758,11 @@ if __name__ == "__main__":
                                 )
             
             # Save updated segments
-            if hasattr(segments[0], '__dict__'):
-                segment_data = [asdict(seg) if hasattr(asdict, '__call__') else seg.__dict__ for seg in segments]
-            else:
-                segment_data = segments
-                
-            with open(segments_path, 'w', encoding='utf-8') as f:
-                json.dump(segment_data, f, indent=2, ensure_ascii=False)
+            segment_data = segments_to_data(segments)
+            self.save_segments(segments_path, segment_data)
             
-            translated_count = 0
-            for seg in segment_data:
-                if isinstance(seg, dict) and seg.get('translated_text'):
-                    translated_count += 1
-                elif hasattr(seg, 'translated_text') and getattr(seg, 'translated_text'):
-                    translated_count += 1
+            # segments_to_data always yields dicts, so no per-item type check is needed
+            translated_count = sum(1 for seg in segment_data if seg.get('translated_text'))
             
             result = {
                 "success": True,
@@ -547,34 +791,13 @@ if __name__ == "__main__":
             video_id = self.get_video_id()
             
             # Load segments
-            segments_path = self.transcripts_dir / f"{video_id}_segments.json"
-            with open(segments_path, 'r', encoding='utf-8') as f:
-                segment_data = json.load(f)
-            
-            # Convert back to DubSegment objects if available
-            if 'DubSegment' in globals():
-                segments = []
-                for data in segment_data:
-                    if isinstance(data, dict):
-                        segment = DubSegment(
-                            start=data.get('start', 0),
-                            end=data.get('end', 0),
-                            original_text=data.get('original_text', ''),
-                            translated_text=data.get('translated_text', ''),
-                            target_duration=data.get('target_duration', 0)
-                        )
-                        for key, value in data.items():
-                            if hasattr(segment, key):
-                                setattr(segment, key, value)
-                        segments.append(segment)
-                    else:
-                        segments.append(data)
-            else:
-                segments = segment_data
+            segments_path = self.get_segments_path(video_id)
+            # Convert back to DubSegment objects if the class is available
+            segments = self.load_segments(segments_path)
             
             # Apply segment rules if available
             if 'load_dubbing_rules' in globals() and 'apply_segment_rules' in globals():
-                dubbing_rules = load_dubbing_rules()
+                dubbing_rules = self.get_dubbing_rules()
                 segments = apply_segment_rules(segments, dubbing_rules.get("segmentRules", []))
             
             # Check if synthesis already exists
@@ -609,30 +832,25 @@ if __name__ == "__main__":
                 else:
                     # Fallback: create placeholder audio files
                     logger.warning("text_chunks_to_audio not available, creating placeholder files")
-                    for i, segment in enumerate(segments):
-                        if isinstance(segment, dict) and segment.get('translated_text'):
-                            audio_filename = f"chunk_{i:03d}.mp3"
-                            segment['audio_file'] = f"audio/{audio_filename}"
-                            
-                            audio_path = self.audio_dir / audio_filename
-                            audio_path.touch()  # Create empty file for demo
-                            audio_files_generated += 1
-                        elif hasattr(segment, 'translated_text') and getattr(segment, 'translated_text'):
-                            audio_filename = f"chunk_{i:03d}.mp3"
-                            segment.audio_file = f"audio/{audio_filename}"
-                            
-                            audio_path = self.audio_dir / audio_filename
-                            audio_path.touch()
-                            audio_files_generated += 1
+                    # Segments are all dicts or all objects, so branch once and name only the voiced ones
+                    if segments and isinstance(segments[0], dict):
+                        voiced = [i for i, segment in enumerate(segments) if segment.get('translated_text')]
+                    else:
+                        voiced = [i for i, segment in enumerate(segments) if getattr(segment, 'translated_text', None)]
+                    placeholder_names = [f"chunk_{i:03d}.mp3" for i in voiced]
+                    
+                    for i, audio_filename in zip(voiced, placeholder_names):
+                        if isinstance(segments[i], dict):
+                            segments[i]['audio_file'] = "audio/" + audio_filename
+                        else:
+                            segments[i].audio_file = "audio/" + audio_filename
+                    
+                    self.create_placeholder_files(str(self.audio_dir), placeholder_names)
+                    audio_files_generated = len(placeholder_names)
             
             # Save updated segments
-            if hasattr(segments[0], '__dict__'):
-                segment_data = [asdict(seg) if hasattr(asdict, '__call__') else seg.__dict__ for seg in segments]
-            else:
-                segment_data = segments
-                
-            with open(segments_path, 'w', encoding='utf-8') as f:
-                json.dump(segment_data, f, indent=2, ensure_ascii=False)
+            segment_data = segments_to_data(segments)
+            self.save_segments(segments_path, segment_data)
             
             result = {
                 "success": True,
@@ -661,30 +879,9 @@ if __name__ == "__main__":
             video_id = self.get_video_id()
             
             # Load segments
-            segments_path = self.transcripts_dir / f"{video_id}_segments.json"
-            with open(segments_path, 'r', encoding='utf-8') as f:
-                segment_data = json.load(f)
-            
-            # Convert back to DubSegment objects if available
-            if 'DubSegment' in globals():
-                segments = []
-                for data in segment_data:
-                    if isinstance(data, dict):
-                        segment = DubSegment(
-                            start=data.get('start', 0),
-                            end=data.get('end', 0),
-                            original_text=data.get('original_text', ''),
-                            translated_text=data.get('translated_text', ''),
-                            target_duration=data.get('target_duration', 0)
-                        )
-                        for key, value in data.items():
-                            if hasattr(segment, key):
-                                setattr(segment, key, value)
-                        segments.append(segment)
-                    else:
-                        segments.append(data)
-            else:
-                segments = segment_data
+            segments_path = self.get_segments_path(video_id)
+            # Convert back to DubSegment objects if the class is available
+            segments = self.load_segments(segments_path)
             
             # Get video file path
             video_file_ref = self.project_config["fileReferences"].get("videoFile")
@@ -700,22 +897,20 @@ if __name__ == "__main__":
                 raise FileNotFoundError(f"Video file not found: {video_path}")
             
             # Create final audio
-            final_audio_path = self.audio_dir / f"{video_id}_dubbed.mp3"
+            # Mixing, effects and the concat fallback stay in mp3 (or WAV); the final codec is applied once, at the end
+            mix_audio_ext = mix_audio_extension() if 'mix_audio_extension' in globals() else "mp3"
+            final_audio_path = self.audio_dir / f"{video_id}_dubbed.{mix_audio_ext}"
             
             # Get video duration
             try:
-                result = subprocess.run([
-                    "ffprobe", "-v", "quiet", "-show_entries", "format=duration",
-                    "-of", "csv=p=0", video_path
-                ], capture_output=True, text=True, check=True)
-                total_duration = float(result.stdout.strip())
+                total_duration = probe_duration(video_path)
             except:
                 total_duration = 300.0  # Fallback duration
             
             # Load dubbing rules for audio settings
             audio_settings = {}
             if 'load_dubbing_rules' in globals():
-                dubbing_rules = load_dubbing_rules()
+                dubbing_rules = self.get_dubbing_rules()
                 audio_settings = dubbing_rules.get("audioSettings", {})
             
             # Create enhanced audio track
@@ -742,17 +937,21 @@ if __name__ == "__main__":
             
             if not audio_created and 'concatenate_audio' in globals():
                 # Fallback to simple concatenation
-                audio_paths = []
-                for segment in segments:
-                    if isinstance(segment, dict) and segment.get('audio_file'):
-                        audio_file_path = self.audio_dir / os.path.basename(segment['audio_file'])
-                        if audio_file_path.exists():
-                            audio_paths.append(str(audio_file_path))
-                    elif hasattr(segment, 'audio_file') and getattr(segment, 'audio_file'):
-                        audio_file_path = self.audio_dir / os.path.basename(segment.audio_file)
-                        if audio_file_path.exists():
-                            audio_paths.append(str(audio_file_path))
+                # One listing of audio_dir instead of a stat per segment
+                with os.scandir(self.audio_dir) as entries:
+                    audio_names = {entry.name for entry in entries}
+                if segments and isinstance(segments[0], dict):
+                    audio_files = [segment.get('audio_file') for segment in segments]
+                else:
+                    audio_files = [getattr(segment, 'audio_file', None) for segment in segments]
+                audio_paths = [
+                    str(self.audio_dir / name)
+                    for name in (os.path.basename(audio_file) for audio_file in audio_files if audio_file)
+                    if name in audio_names
+                ]
                 
+                # The mp3 chunks are stream-copied, so the fallback always writes mp3
+                final_audio_path = self.audio_dir / f"{video_id}_dubbed.mp3"
                 concatenate_audio(audio_paths, str(final_audio_path))
                 logger.info(f"🎬 Final audio saved to {final_audio_path}")
             
@@ -760,11 +959,14 @@ if __name__ == "__main__":
             if 'apply_audio_effects' in globals() and 'config' in globals():
                 preset = config.get("audio_effects_preset", "voice")
                 if preset != "off":
-                    effects_audio_path = self.audio_dir / f"{video_id}_dubbed_effects.mp3"
+                    effects_audio_path = self.audio_dir / f"{video_id}_dubbed_effects.{mix_audio_ext}"
                     if apply_audio_effects(str(final_audio_path), str(effects_audio_path), preset):
                         final_audio_path = effects_audio_path
                         logger.info(f"🎵 Audio effects applied: {preset}")
             
+            if 'encode_final_audio' in globals():
+                final_audio_path = Path(encode_final_audio(str(final_audio_path)))
+            
             # Create final video
             final_video_path = self.output_dir / f"{video_id}_final.mp4"
             
@@ -778,7 +980,7 @@ if __name__ == "__main__":
                     "-i", video_path,
                     "-i", str(final_audio_path),
                     "-c:v", "copy",
-                    "-c:a", "aac",
+                    "-c:a", "copy" if final_audio_path.suffix in (".m4a", ".aac") else "aac",
                     "-map", "0:v:0",
                     "-map", "1:a:0",
                     str(final_video_path)
@@ -810,11 +1012,15 @@ if __name__ == "__main__":
                 "message": f"❌ Final assembly failed: {e}"
             }
 
+_project_config_ready = False
+
 def setup_project_config():
-    """Setup project-specific config overrides"""
-    if 'config' not in globals():
+    """Setup project-specific config overrides, once per process"""
+    global _project_config_ready
+    if _project_config_ready or 'config' not in globals():
         return
-        
+    _project_config_ready = True
+    
     # These will be overridden by the project pipeline as needed
     project_config_defaults = {
         "force_whisperx": True,
@@ -826,34 +1032,171 @@ def setup_project_config():
         if key not in config:
             config[key] = value
 
+# Step name to the ProjectPipeline method that runs it, in pipeline order
+STEP_HANDLERS = {
+    "download": ProjectPipeline.step_download,
+    "transcribe": ProjectPipeline.step_transcribe,
+    "translate": ProjectPipeline.step_translate,
+    "synthesize": ProjectPipeline.step_synthesize,
+    "combine": ProjectPipeline.step_combine,
+}
+PIPELINE_STEPS = list(STEP_HANDLERS)
+SOCKET_NAME = ".pipeline.sock"
+
+def run_step(pipeline: ProjectPipeline, step: str, force: bool = False, snapshot: bool = True) -> Dict[str, Any]:
+    """Execute a single pipeline step, flushing project files before returning"""
+    handler = STEP_HANDLERS.get(step)
+    if handler is None:
+        raise ValueError(f"Unknown pipeline step: {step}")
+    
+    # Flushing writes project.json and segments once, before Go sees the result
+    pipeline._snapshot_deferred = not snapshot
+    stamp_steps = []
+    try:
+        if not force and pipeline.is_step_up_to_date(step):
+            logger.info(f"⏭️ Step '{step}' is up to date, skipping")
+            return pipeline.cached_step_result(step)
+        
+        # Earlier steps that are current now stay current after this step rewrites shared files
+        stamp_steps = pipeline.up_to_date_steps_before(step)
+        result = handler(pipeline)
+        pipeline.record_step_result(step, result)
+        return result
+    finally:
+        pipeline.flush(snapshot, stamp_steps)
+
+def run_all_steps(pipeline: ProjectPipeline, force: bool = False) -> Dict[str, Any]:
+    """Run every step in order in this process, stopping at the first failure"""
+    # Imports, loaded models, parsed rules and segment data all stay warm from one step to the next
+    # project.json is snapshotted once at the end; step status is in the append-only log meanwhile
+    results = {"steps": {}}
+    with pipeline:
+        for step in PIPELINE_STEPS:
+            step_result = run_step(pipeline, step, force, snapshot=False)
+            results["steps"][step] = step_result
+            if not step_result.get("success"):
+                results["success"] = False
+                results["failedStep"] = step
+                if "error" in step_result:
+                    results["error"] = step_result["error"]
+                return results
+    
+    results["success"] = True
+    results["message"] = "✅ Full pipeline completed successfully"
+    return results
+
+def handle_request(pipeline: ProjectPipeline, line: bytes) -> tuple:
+    """Run one {"step": ...} request line, returning (result, whether to stop serving)"""
+    try:
+        request = loads_json(line)
+        step = request["step"]
+        if step == "shutdown":
+            return {"success": True}, True
+        
+        # Parsed config is reused across requests; load_project_config re-reads it only if Go edited it
+        pipeline.project_config = pipeline.load_project_config()
+        if step == "all":
+            return run_all_steps(pipeline, request.get("force", False)), False
+        return run_step(pipeline, step, request.get("force", False)), False
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "message": f"❌ Pipeline failed: {e}"
+        }, False
+
+def serve_stdio(project_dir: str):
+    """Answer step requests read from stdin, one JSON line per request, until stdin closes"""
+    # Results get stdout to themselves; print() output and child processes are moved to stderr
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    
+    pipeline = ProjectPipeline(project_dir)
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+        result, stop = handle_request(pipeline, line)
+        replies.write(dumps_json(result, indent=False) + b'\n')
+        replies.flush()
+        if stop:
+            break
+
+def serve(project_dir: str):
+    """Answer step requests on a UNIX socket so one process serves the whole run"""
+    import socket
+    
+    sock_path = Path(project_dir) / SOCKET_NAME
+    if sock_path.exists():
+        sock_path.unlink()  # Stale socket from a previous server
+    
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(sock_path))
+    server.listen(1)
+    logger.info(f"🔌 Serving pipeline steps on {sock_path}")
+    
+    pipeline = ProjectPipeline(project_dir)
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn, conn.makefile('rb') as rfile:
+                line = rfile.readline()
+                if not line:
+                    continue
+                
+                result, stop = handle_request(pipeline, line)
+                conn.sendall(dumps_json(result, indent=False) + b'\n')
+                if stop:
+                    return
+    finally:
+        server.close()
+        try:
+            sock_path.unlink()
+        except FileNotFoundError:
+            pass
+
+def emit_result(result: Dict[str, Any]):
+    """Write the result JSON for Go straight to the stdout byte stream"""
+    sys.stdout.flush()  # Keep any earlier print() output ahead of the result
+    # Go only unmarshals the result, so skip indentation
+    sys.stdout.buffer.write(dumps_json(result, indent=False) + b'\n')
+    sys.stdout.buffer.flush()
+
 def main():
     parser = argparse.ArgumentParser(description="VoiceWeave Studio Project Pipeline")
     parser.add_argument("project_dir", help="Project directory path")
-    parser.add_argument("step", choices=["download", "transcribe", "translate", "synthesize", "combine"], 
-                       help="Pipeline step to execute")
+    parser.add_argument("step", nargs="?", choices=PIPELINE_STEPS + ["all"],
+                       help="Pipeline step to execute, or 'all' to run every step in this process")
+    parser.add_argument("--force", action="store_true",
+                       help="Run the step even if its inputs are unchanged since it last completed")
+    parser.add_argument("--serve", action="store_true",
+                       help=f"Serve step requests on <project_dir>/{SOCKET_NAME} instead of running one step")
+    parser.add_argument("--stdio", action="store_true",
+                       help="Serve step requests read as JSON lines on stdin, replying on stdout")
     
     args = parser.parse_args()
+    if not (args.serve or args.stdio) and args.step is None:
+        parser.error("a step is required unless --serve or --stdio is given")
     
     try:
         # Setup config defaults
         setup_project_config()
         
-        pipeline = ProjectPipeline(args.project_dir)
+        if args.serve:
+            serve(args.project_dir)
+            sys.exit(0)
+        if args.stdio:
+            serve_stdio(args.project_dir)
+            sys.exit(0)
         
-        # Execute the requested step
-        if args.step == "download":
-            result = pipeline.step_download()
-        elif args.step == "transcribe":
-            result = pipeline.step_transcribe()
-        elif args.step == "translate":
-            result = pipeline.step_translate()
-        elif args.step == "synthesize":
-            result = pipeline.step_synthesize()
-        elif args.step == "combine":
-            result = pipeline.step_combine()
+        pipeline = ProjectPipeline(args.project_dir)
+        if args.step == "all":
+            result = run_all_steps(pipeline, args.force)
+        else:
+            result = run_step(pipeline, args.step, args.force)
         
         # Output result as JSON for Go to parse
-        print(json.dumps(result, indent=2))
+        emit_result(result)
         
         # Exit with appropriate code
         sys.exit(0 if result["success"] else 1)
@@ -864,7 +1207,7 @@ def main():
             "error": str(e),
             "message": f"❌ Pipeline failed: {e}"
         }
-        print(json.dumps(error_result, indent=2))
+        emit_result(error_result)
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -1,39 +1,43 @@
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
 from structs.DubSegment import DubSegment
 
-def segment_matches_rule(segment: DubSegment, rule: Dict) -> bool:
-    """Check if a segment matches the detection criteria of a rule"""
+def _rule_predicate(rule: Dict) -> Optional[Callable[[DubSegment, str], bool]]:
+    """Build a rule's detection check over (segment, lowercased original text), or None if it can never match"""
     method = rule.get("detectionMethod", "")
     value = rule.get("detectionValue", "")
-    text = segment.original_text
     
+    # Values are lowercased and thresholds parsed here, once per rule rather than once per segment
     if method == "text-contains":
-        return value.lower() in text.lower()
+        needle = value.lower()
+        return lambda segment, text_lower: needle in text_lower
     elif method == "text-starts":
-        return text.lower().startswith(value.lower())
+        prefix = value.lower()
+        return lambda segment, text_lower: text_lower.startswith(prefix)
     elif method == "text-ends":
-        return text.lower().endswith(value.lower())
-    elif method == "duration-less":
+        suffix = value.lower()
+        return lambda segment, text_lower: text_lower.endswith(suffix)
+    elif method in ("duration-less", "duration-more", "word-count"):
         try:
-            threshold = float(value)
-            return segment.target_duration < threshold
-        except:
-            return False
-    elif method == "duration-more":
-        try:
-            threshold = float(value)
-            return segment.target_duration > threshold
-        except:
-            return False
-    elif method == "word-count":
-        try:
-            threshold = int(value)
-            word_count = len(text.split())
-            return word_count <= threshold
-        except:
-            return False
+            threshold = int(value) if method == "word-count" else float(value)
+        except (TypeError, ValueError):
+            return None
+        if method == "duration-less":
+            return lambda segment, text_lower: segment.target_duration is not None and segment.target_duration < threshold
+        if method == "duration-more":
+            return lambda segment, text_lower: segment.target_duration is not None and segment.target_duration > threshold
+        # Lowercasing leaves whitespace alone, so the word count is the same
+        return lambda segment, text_lower: len(text_lower.split()) <= threshold
     
-    return False
+    return None
+
+def segment_matches_rule(segment: DubSegment, rule: Dict, text_lower: Optional[str] = None) -> bool:
+    """Check if a segment matches the detection criteria of a rule; pass text_lower to reuse a lowercased original_text"""
+    predicate = _rule_predicate(rule)
+    if predicate is None:
+        return False
+    if text_lower is None:
+        text_lower = segment.original_text.lower()
+    return predicate(segment, text_lower)
 
 def apply_segment_action(segment: DubSegment, rule: Dict) -> DubSegment:
     """Apply the action specified by a rule to a segment"""
@@ -72,9 +76,16 @@ def apply_segment_rules(segments: List[DubSegment], rules: List[Dict]) -> List[D
     if not rules:
         return segments
     
+    # Build each rule's check once; rules that can never match are dropped up front
+    predicates = [(rule, predicate) for rule in rules if (predicate := _rule_predicate(rule)) is not None]
+    if not predicates:
+        return segments
+    
     for segment in segments:
-        for rule in rules:
-            if segment_matches_rule(segment, rule):
+        # Lowercase each segment's text once, shared by all of its text checks
+        text_lower = segment.original_text.lower()
+        for rule, matches in predicates:
+            if matches(segment, text_lower):
                 segment = apply_segment_action(segment, rule)
                 print(f"⚙️ Applied rule '{rule.get('name')}' to segment: {segment.original_text[:50]}...")
     
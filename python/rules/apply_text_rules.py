@@ -1,17 +1,78 @@
-from typing import Dict, List
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Pattern, Tuple, Union
 
 
-def apply_text_rules(text: str, language: str, rules: List[Dict]) -> str:
-    """Apply text replacement rules to improve pronunciation"""
-    if not rules:
-        return text
+class CompiledTextRules(NamedTuple):
+    """Text rules filtered for one language, sorted by priority, with patterns pre-compiled"""
+    language: str
+    # (original, compiled pattern or None for a case-sensitive literal, replacement)
+    rules: List[Tuple[str, Optional[Pattern], str]]
+    # All rules as one alternation (group i + 1 is rule i), or None if they must run one by one
+    fused: Optional[Pattern] = None
+
+
+@lru_cache(maxsize=1024)
+def _case_insensitive_pattern(original: str) -> Pattern:
+    """Compiled pattern matching original literally, ignoring case; shared by every compile of the same rule"""
+    return re.compile(re.escape(original), re.IGNORECASE)
+
+
+def _overlaps(a: str, b: str) -> bool:
+    """True if a and b can share characters in some text: one contains the other, or an end of one starts the other"""
+    if a in b or b in a:
+        return True
+    return any(a.endswith(b[:k]) or b.endswith(a[:k]) for k in range(1, min(len(a), len(b))))
+
+
+def _folds_like_regex(text: str) -> bool:
+    """True if re.IGNORECASE matches each character of text exactly where str.lower() agrees, code point by code point.
+
+    Characters like 'ß', 'ẞ', 'İ', 'ı', 'ſ' or 'ς' fail: they lower to several code points, or the regex
+    engine also equates them with a character of a different lowercase.
+    """
+    if text.isascii():
+        return True
+    for c in text:
+        lower = c.lower()
+        if len(lower) != 1 or c.upper().lower() != lower or c.casefold() != lower:
+            return False
+    return True
+
+
+def _fuse_rules(rules: List[Tuple[str, Optional[Pattern], str]]) -> Optional[Pattern]:
+    """One alternation matching every rule in a single scan, or None if applying them in order could differ"""
+    if len(rules) < 2:
+        return None
     
-    modified_text = text
-    applied_rules = []
+    # A single pass equals the sequential one only if no two originals can overlap in the text
+    # and no replacement can form or break another rule's match; compare lowercased to cover both kinds,
+    # which is only the regex's own notion of case for characters that fold one code point at a time
+    if not all(_folds_like_regex(original) and _folds_like_regex(replacement) for original, _, replacement in rules):
+        return None
+    folded = [(original.lower(), replacement.lower()) for original, _, replacement in rules]
+    for i, (original_i, replacement_i) in enumerate(folded):
+        # Regex replacements expand backslash escapes, which a literal dispatch would not
+        if rules[i][1] is not None and "\\" in rules[i][2]:
+            return None
+        for j, (original_j, _) in enumerate(folded):
+            if i != j and (_overlaps(original_i, original_j) or _overlaps(original_j, replacement_i)):
+                return None
+    
+    alternatives = [
+        f"({re.escape(original)})" if pattern is None else f"((?i:{re.escape(original)}))"
+        for original, pattern, _ in rules
+    ]
+    return re.compile("|".join(alternatives))
+
+
+def compile_text_rules(rules: List[Dict], language: str) -> CompiledTextRules:
+    """Prepare text rules once so they can be applied to many segments"""
+    compiled = []
     
     # Sort rules by priority (high -> medium -> low)
     priority_order = {"high": 0, "medium": 1, "low": 2}
-    sorted_rules = sorted(rules, key=lambda r: priority_order.get(r.get("priority", "medium"), 1))
+    sorted_rules = sorted(rules or [], key=lambda r: priority_order.get(r.get("priority", "medium"), 1))
     
     for rule in sorted_rules:
         # Check if rule applies to this language
@@ -21,23 +82,56 @@ def apply_text_rules(text: str, language: str, rules: List[Dict]) -> str:
             
         original = rule.get("original", "")
         replacement = rule.get("replacement", "")
-        case_sensitive = rule.get("caseSensitive", False)
         
         if not original or not replacement:
             continue
         
+        if rule.get("caseSensitive", False):
+            compiled.append((original, None, replacement))
+        else:
+            compiled.append((original, _case_insensitive_pattern(original), replacement))
+    
+    return CompiledTextRules(language, compiled, _fuse_rules(compiled))
+
+
+def apply_text_rules(text: str, language: str, rules: Union[List[Dict], CompiledTextRules]) -> str:
+    """Apply text replacement rules to improve pronunciation"""
+    if not rules:
+        return text
+    
+    # Callers looping over segments pass compile_text_rules() output to skip re-sorting and re-compiling
+    if not isinstance(rules, CompiledTextRules):
+        rules = compile_text_rules(rules, language)
+    
+    if rules.fused is not None:
+        # One scan of the text; the matched group says which rule hit
+        hits = set()
+        
+        def dispatch(match):
+            index = match.lastindex - 1
+            hits.add(index)
+            return rules.rules[index][2]
+        
+        modified_text = rules.fused.sub(dispatch, text)
+        applied_rules = [rules.rules[index][0] for index in sorted(hits)]
+        if applied_rules:
+            print(f"📝 Applied text rules: {', '.join(applied_rules)}")
+        return modified_text
+    
+    modified_text = text
+    applied_rules = []
+    
+    for original, pattern, replacement in rules.rules:
         # Apply replacement
-        if case_sensitive:
+        if pattern is None:
             if original in modified_text:
                 modified_text = modified_text.replace(original, replacement)
-                applied_rules.append(rule.get("original"))
+                applied_rules.append(original)
         else:
             # Case-insensitive replacement
-            import re
-            pattern = re.compile(re.escape(original), re.IGNORECASE)
-            if pattern.search(modified_text):
-                modified_text = pattern.sub(replacement, modified_text)
-                applied_rules.append(rule.get("original"))
+            modified_text, count = pattern.subn(replacement, modified_text)
+            if count:
+                applied_rules.append(original)
     
     if applied_rules:
         print(f"📝 Applied text rules: {', '.join(applied_rules)}")
@@ -1,4 +1,4 @@
-import json
+from util.json_io import load_json
 import os
 from typing import Dict
 
@@ -29,10 +29,9 @@ def load_dubbing_rules() -> Dict:
         return default_rules
     
     try:
-        with open(rules_path, 'r', encoding='utf-8') as f:
-            rules = json.load(f)
-            print(f"✅ Loaded dubbing rules from {rules_path}")
-            return rules
+        rules = load_json(rules_path)
+        print(f"✅ Loaded dubbing rules from {rules_path}")
+        return rules
     except Exception as e:
         print(f"⚠️ Error loading rules file: {e}")
         return default_rules
@@ -1,7 +1,12 @@
 from typing import List, Dict
 from dataclasses import dataclass
 
-@dataclass
+from util.fast_asdict import fast_asdict
+from util.fast_fromdict import fast_fromdict
+
+@fast_asdict
+@fast_fromdict
+@dataclass(slots=True)
 class DubSegment:
     start: float
     end: float
@@ -16,4 +21,6 @@ class DubSegment:
     buffer_before: float = 0.2
     buffer_after: float = 0.3
     priority: int = 1
-    speaker: str = "SPEAKER_UNKNOWN"
\ No newline at end of file
+    speaker: str = "SPEAKER_UNKNOWN"
+    audio_duration: float = None  # Seconds, recorded when audio_file is synthesized
+
@@ -0,0 +1,23 @@
+import os
+from datetime import datetime
+from dataclasses import dataclass
+
+from util.fast_asdict import fast_asdict
+
+# Keys of a project.json fileReferences entry, matching the Go FileReference JSON tags
+_FILE_REF_KEYS = ("path", "isLinked", "size", "lastModified")
+
+@fast_asdict(keys=_FILE_REF_KEYS)
+@dataclass(slots=True)
+class FileRef:
+    path: str
+    is_linked: bool
+    size: int = 0
+    last_modified: str = ""
+
+    @classmethod
+    def from_file(cls, path: str, is_linked: bool, file_path: str) -> "FileRef":
+        """Build a reference to file_path with its size and mtime from a single stat"""
+        st = os.stat(file_path)
+        last_modified = datetime.fromtimestamp(st.st_mtime).astimezone().isoformat(timespec="seconds")
+        return cls(path, is_linked, st.st_size, last_modified)
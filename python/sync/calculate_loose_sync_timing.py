@@ -1,7 +1,21 @@
-import subprocess
+import os
 from typing import Dict, List
 
 from structs.DubSegment import DubSegment
+from util.probe_durations import probe_durations
+
+
+def _directory_names(directory: str, listings: Dict[str, frozenset]) -> frozenset:
+    """Names in a directory, listed once per call site and reused for every segment stored there"""
+    names = listings.get(directory)
+    if names is None:
+        try:
+            with os.scandir(directory or ".") as entries:
+                names = frozenset(entry.name for entry in entries)
+        except (FileNotFoundError, NotADirectoryError):
+            names = frozenset()
+        listings[directory] = names
+    return names
 
 
 def calculate_loose_sync_timing(segments: List[DubSegment], audio_settings: Dict) -> List[Dict]:
@@ -13,58 +27,57 @@ def calculate_loose_sync_timing(segments: List[DubSegment], audio_settings: Dict
     current_time = 0.0
     min_gap = 0.15  # Minimum gap between segments (150ms)
     
+    # Filter out segments without audio files first, listing each audio directory once instead of stat'ing every file
+    valid_segments = []
+    listings = {}
     for i, segment in enumerate(segments):
-        if not segment.audio_file or not os.path.exists(segment.audio_file):
+        if segment.audio_file and os.path.basename(segment.audio_file) in _directory_names(os.path.dirname(segment.audio_file), listings):
+            valid_segments.append((i, segment))
+        else:
             print(f"⚠️ Skipping segment {i}: no audio file")
-            continue
-        
-        # Get audio duration
-        try:
-            result = subprocess.run([
-                "ffprobe", "-v", "quiet", "-show_entries", "format=duration",
-                "-of", "default=noprint_wrappers=1:nokey=1", segment.audio_file
-            ], capture_output=True, text=True, check=True)
-            audio_duration = float(result.stdout.strip())
-        except:
+    
+    # Segments synthesized before durations were recorded are probed together, up front
+    unprobed = [segment for _, segment in valid_segments if segment.audio_duration is None]
+    if unprobed:
+        for segment, duration in zip(unprobed, probe_durations([segment.audio_file for segment in unprobed])):
+            segment.audio_duration = duration
+    
+    prev_speaker = None
+    for idx, (original_i, segment) in enumerate(valid_segments):
+        # Recorded or probed above; falls back to the source span if probing failed
+        audio_duration = segment.audio_duration
+        if audio_duration is None:
             audio_duration = segment.end - segment.start
         
-        # Decide if we should sync to original timing
-        should_sync = False
-        sync_reason = ""
-        
-        # Always sync first segment
-        if i == 0:
-            should_sync = True
+        # Always sync the first segment, and sync on speaker changes
+        if idx == 0:
             sync_reason = "first_segment"
-        
-        # Sync on speaker changes
-        elif i > 0:
-            prev_speaker = segments[i-1].speaker
-            curr_speaker = segment.speaker
-            if prev_speaker != curr_speaker:
-                should_sync = True
-                sync_reason = "speaker_change"
+        elif segment.speaker != prev_speaker:
+            sync_reason = "speaker_change"
+        else:
+            sync_reason = ""
+        prev_speaker = segment.speaker
         
         # Calculate timing
         natural_start = current_time + min_gap
         original_start = segment.start
         
-        if should_sync:
+        if sync_reason:
             # Try to sync to original, but not if it would cause overlap
             if original_start >= current_time + 0.05:  # Small 50ms buffer
                 final_start = original_start
                 synced = True
-                print(f"   🎯 Segment {i}: SYNC to original ({sync_reason}) at {final_start:.2f}s")
+                print(f"   🎯 Segment {original_i}: SYNC to original ({sync_reason}) at {final_start:.2f}s")
             else:
                 final_start = natural_start
                 synced = False
-                print(f"   ⏭️  Segment {i}: SYNC attempted ({sync_reason}) but unsafe, using flow at {final_start:.2f}s")
+                print(f"   ⏭️  Segment {original_i}: SYNC attempted ({sync_reason}) but unsafe, using flow at {final_start:.2f}s")
         else:
             # Natural flow timing
             final_start = natural_start
             synced = False
             drift = final_start - original_start
-            print(f"   ➡️  Segment {i}: Natural flow at {final_start:.2f}s (drift: {drift:+.2f}s)")
+            print(f"   ➡️  Segment {original_i}: Natural flow at {final_start:.2f}s (drift: {drift:+.2f}s)")
         
         # Add to timed segments
         timed_segments.append({
@@ -72,7 +85,8 @@ def calculate_loose_sync_timing(segments: List[DubSegment], audio_settings: Dict
             'start_time': final_start,
             'duration': audio_duration,
             'crossfade': False,  # Keep it simple for now
-            'index': i,
+            'index': idx,
+            'original_index': original_i,
             'synced': synced,
             'sync_reason': sync_reason if synced else None,
             'original_start': original_start,
@@ -84,9 +98,10 @@ def calculate_loose_sync_timing(segments: List[DubSegment], audio_settings: Dict
     
     # Print simple summary
     total_segments = len(timed_segments)
-    synced_segments = sum(1 for ts in timed_segments if ts['synced'])
-    print(f"\n📊 Timing Summary:")
-    print(f"   Total segments: {total_segments}")
-    print(f"   Synced segments: {synced_segments} ({synced_segments/total_segments*100:.1f}%)")
+    if total_segments:
+        synced_segments = sum(1 for ts in timed_segments if ts['synced'])
+        print(f"\n📊 Timing Summary:")
+        print(f"   Total segments: {total_segments}")
+        print(f"   Synced segments: {synced_segments} ({synced_segments/total_segments*100:.1f}%)")
     
     return timed_segments
@@ -1,7 +1,56 @@
 import os
 import subprocess
-from typing import Dict, List
+import tempfile
+from subprocess import DEVNULL, PIPE
+from typing import Dict, List, Tuple
 from structs.DubSegment import DubSegment
+from util.final_audio_codec import mix_audio_codec_args
+from util.stderr_tail import stderr_tail
+from sync.calculate_loose_sync_timing import calculate_loose_sync_timing
+
+# Headroom a playlist slot needs past its clip's recorded duration (about two MP3 frames at 24 kHz)
+SLOT_MARGIN = 0.05
+
+def _split_by_slot(timed_segments: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """Split segments into those safe to lay out in the playlist and those to mix in with adelay.
+
+    In the playlist a clip that decodes past the next clip's start has that clip's head dropped by
+    aresample, where adelay+amix would overlap the two. So a clip goes in the playlist only if its
+    duration was measured and its slot leaves SLOT_MARGIN to spare. Pulling a clip out only
+    lengthens the slot before it, so one backward pass settles every slot.
+    """
+    playlist, delayed = [], []
+    next_start = None
+    for ts in reversed(timed_segments):
+        measured = ts['segment'].audio_duration is not None
+        if next_start is None or (measured and next_start - ts['start_time'] >= ts['duration'] + SLOT_MARGIN - 1e-6):
+            playlist.append(ts)
+            next_start = ts['start_time']
+        else:
+            delayed.append(ts)
+    playlist.reverse()
+    delayed.reverse()
+    return playlist, delayed
+
+def _concat_entry(path: str) -> str:
+    """A concat demuxer `file` line, with the path quoted for the demuxer's parser"""
+    escaped = path.replace("'", "'\\''")
+    return f"file '{escaped}'\n"
+
+def _write_speech_playlist(timed_segments: List[Dict], playlist_path: str):
+    """List the segments in timeline order, each lasting until the next one's scheduled start"""
+    lines = []
+    for ts, next_ts in zip(timed_segments, timed_segments[1:] + [None]):
+        lines.append(_concat_entry(os.path.abspath(ts['segment'].audio_file)))
+        # The demuxer starts the next file `duration` after this one, whatever this one decodes to,
+        # so every segment keeps its absolute start instead of inheriting earlier length errors
+        if next_ts is not None:
+            # Whole microseconds (the demuxer's resolution) taken between rounded starts, so rounding never accumulates
+            duration_us = round(next_ts['start_time'] * 1e6) - round(ts['start_time'] * 1e6)
+            lines.append(f"duration {duration_us}us\n")
+    
+    with open(playlist_path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
 
 
 def create_enhanced_audio_track_with_loose_sync(segments: List[DubSegment], output_path: str, total_duration: float, audio_settings: Dict, background_audio_path=None):
@@ -11,148 +60,65 @@ def create_enhanced_audio_track_with_loose_sync(segments: List[DubSegment], outp
     # Import config here to get latest settings
     from config import config
     
-    cmd = ["ffmpeg", "-y"]
-    
     # Calculate loose sync timing (same as working test)
-    timed_segments = []
-    current_time = 0.0
-    min_gap = 0.15  # Minimum gap between segments (150ms)
-    
-    # Filter out segments without audio files first
-    valid_segments = []
-    for i, segment in enumerate(segments):
-        if segment.audio_file and os.path.exists(segment.audio_file):
-            valid_segments.append((i, segment))
-        else:
-            print(f"⚠️ Skipping segment {i}: no audio file")
-    
-    if not valid_segments:
+    timed_segments = calculate_loose_sync_timing(segments, audio_settings)
+    if not timed_segments:
         print("⚠️ No valid audio segments to process")
         return False
     
-    # Add inputs for valid segments
-    for idx, (original_i, seg) in enumerate(valid_segments):
-        cmd.extend(["-i", seg.audio_file])
-    
-    # Add background audio input (will be the last input)
-    background_input_index = len(valid_segments)
+    # Background audio is the last input, after the speech playlist and any adelay'd clips
     if background_audio_path and os.path.exists(background_audio_path):
-        cmd.extend(["-i", background_audio_path])
         print(f"🎵 Adding background audio: {background_audio_path}")
         has_background = True
     else:
         print("⚠️ Background audio not found or not specified")
         has_background = False
     
-    # Process timing for valid segments
-    for idx, (original_i, seg) in enumerate(valid_segments):
-        # Get audio duration
-        try:
-            result = subprocess.run([
-                "ffprobe", "-v", "quiet", "-show_entries", "format=duration",
-                "-of", "default=noprint_wrappers=1:nokey=1", seg.audio_file
-            ], capture_output=True, text=True, check=True)
-            audio_duration = float(result.stdout.strip())
-        except:
-            audio_duration = seg.end - seg.start
-        
-        # Decide if we should sync to original timing
-        should_sync = False
-        sync_reason = ""
-        
-        # Always sync first segment
-        if idx == 0:
-            should_sync = True
-            sync_reason = "first_segment"
-        
-        # Sync on speaker changes
-        elif idx > 0:
-            prev_speaker = valid_segments[idx-1][1].speaker
-            curr_speaker = seg.speaker
-            if prev_speaker != curr_speaker:
-                should_sync = True
-                sync_reason = "speaker_change"
-        
-        # Calculate timing
-        natural_start = current_time + min_gap
-        original_start = seg.start
-        
-        if should_sync:
-            # Try to sync to original, but not if it would cause overlap
-            if original_start >= current_time + 0.05:  # Small 50ms buffer
-                final_start = original_start
-                synced = True
-                print(f"   🎯 Segment {original_i}: SYNC to original ({sync_reason}) at {final_start:.2f}s")
-            else:
-                final_start = natural_start
-                synced = False
-                print(f"   ⏭️  Segment {original_i}: SYNC attempted ({sync_reason}) but unsafe, using flow at {final_start:.2f}s")
-        else:
-            # Natural flow timing
-            final_start = natural_start
-            synced = False
-            drift = final_start - original_start
-            print(f"   ➡️  Segment {original_i}: Natural flow at {final_start:.2f}s (drift: {drift:+.2f}s)")
-        
-        # Add to timed segments
-        timed_segments.append({
-            'segment': seg,
-            'start_time': final_start,
-            'duration': audio_duration,
-            'index': idx,  # Use the new index for FFmpeg inputs
-            'original_index': original_i,
-            'synced': synced,
-            'sync_reason': sync_reason if synced else None,
-            'original_start': original_start,
-            'drift': final_start - original_start
-        })
-        
-        # Update current time for next segment
-        current_time = final_start + audio_duration
-    
-    # Print simple summary (like working test)
-    total_segments = len(timed_segments)
-    synced_segments = sum(1 for ts in timed_segments if ts['synced'])
-    print(f"\n📊 Timing Summary:")
-    print(f"   Total segments: {total_segments}")
-    print(f"   Synced segments: {synced_segments} ({synced_segments/total_segments*100:.1f}%)")
-    
     # ===== FIXED FFMPEG LOGIC WITH CONSISTENT VOLUME AND BACKGROUND AUDIO =====
-    
-    filter_parts = []
+    # Speech is laid out with the concat demuxer, so every segment is decoded once in timeline
+    # order, instead of mixing one delayed stream per segment for the whole duration
     
     # Get volume setting from config
     # target_volume = config.get("output_volume", 1.8)
     target_volume = config.get("vocal_volume", 1)  # Dubbed vocals volume
     background_volume = config.get("background_volume", 0.8)  # Lower volume for background
-    audio_quality = config.get("audio_quality", "128k")
     
-    # Process speech segments
-    for i, ts in enumerate(timed_segments):
-        # Create delay filter with pre-normalization to prevent volume ramping
-        delay_ms = int(ts['start_time'] * 1000)
-        # Pre-normalize each segment to consistent level (0.7 = safe level)
-        filter_parts.append(f"[{i}:a]volume=0.6,adelay={delay_ms}|{delay_ms}[delayed{i}]")
+    for ts in timed_segments:
         print(f"   Segment {ts['original_index']}: scheduled at {ts['start_time']:.2f}s")
     
-    # Mix all speech inputs with fixed weights to prevent dynamic volume adjustment
-    delayed_inputs = [f"[delayed{i}]" for i in range(len(timed_segments))]
-    num_inputs = len(delayed_inputs)
-    
-    # Use equal weights and disable normalization to prevent volume ramping
-    weights = " ".join(["1"] * num_inputs)
-    mix_filter = "".join(delayed_inputs) + f"amix=inputs={num_inputs}:weights={weights}:normalize=0[speech_mixed]"
-    filter_parts.append(mix_filter)
+    playlist_segments, delayed_segments = _split_by_slot(timed_segments)
+    if delayed_segments:
+        print(f"   {len(delayed_segments)} segment(s) without a safe playlist slot are mixed in with adelay")
+    
+    # Shift the playlist to its first segment's start, and let aresample fill every gap in the
+    # timestamps with silence, sample-accurately, from 0 on: the same placement adelay gave each segment.
+    # Decoded MP3 frames keep the encoder delay they trimmed in their timestamps (1105 samples for LAME);
+    # rebasing on STARTPTS cancels it for every clip, as they all come from the same encoder
+    first_start = playlist_segments[0]['start_time']
+    place = f"asetpts=PTS-STARTPTS+{first_start:.6f}/TB,aresample=async=1:min_hard_comp=0.001:first_pts=0"
+    filter_parts = [f"[0:a]{place}[playlist]"]
+    
+    # Clips pulled out of the playlist are inputs 1..n, each delayed to its start and summed in
+    speech_labels = ["[playlist]"]
+    for i, ts in enumerate(delayed_segments, start=1):
+        # Fractional milliseconds keep these as sample-accurate as the playlist
+        filter_parts.append(f"[{i}:a]adelay={ts['start_time'] * 1000:.3f}:all=1[delayed{i}]")
+        speech_labels.append(f"[delayed{i}]")
+    if len(speech_labels) > 1:
+        filter_parts.append(f"{''.join(speech_labels)}amix=inputs={len(speech_labels)}:normalize=0[speech_mixed]")
+        speech_label = "[speech_mixed]"
+    else:
+        speech_label = "[playlist]"
     
-    # Apply final volume boost to speech (simple, no dynamic processing)
-    filter_parts.append(f"[speech_mixed]volume={target_volume}[speech_out]")
+    # Pre-normalize speech to a consistent level (0.6 = safe level), then apply the vocal volume
+    filter_parts.append(f"{speech_label}volume=0.6,volume={target_volume}[speech_out]")
     
     if has_background:
         # Process background audio - just set volume, it should play full length in parallel
-        filter_parts.append(f"[{background_input_index}:a]volume={background_volume}[background_out]")
+        background_input = len(delayed_segments) + 1
+        filter_parts.append(f"[{background_input}:a]volume={background_volume}[background_out]")
         
         # Mix speech and background together
-        # filter_parts.append("[speech_out][background_out]amix=inputs=2:weights=1 1:normalize=0[final_out]")
         filter_parts.append("[speech_out][background_out]amix=inputs=2:weights=1 1:normalize=0[final_out]")
         
         print(f"🔊 Volume: Speech {target_volume}x + Background {background_volume}x (NO dynamic processing)")
@@ -162,18 +128,29 @@ def create_enhanced_audio_track_with_loose_sync(segments: List[DubSegment], outp
         final_map = "[speech_out]"
     
     filter_complex = ";".join(filter_parts)
-    cmd.extend([
-        "-filter_complex", filter_complex,
-        "-map", final_map,
-        "-c:a", "libmp3lame",
-        "-b:a", audio_quality,
-        output_path
-    ])
-    
     print(f"🔍 DEBUG: Filter: {filter_complex}")
     
     try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            playlist_path = os.path.join(tmp_dir, "speech.txt")
+            _write_speech_playlist(playlist_segments, playlist_path)
+            
+            cmd = [
+                "ffmpeg", "-y", "-v", "error",
+                "-filter_complex_threads", str(os.cpu_count() or 1),  # Global option, so it goes before the inputs
+                "-f", "concat", "-safe", "0", "-i", playlist_path
+            ]
+            for ts in delayed_segments:
+                cmd.extend(["-i", ts['segment'].audio_file])
+            if has_background:
+                cmd.extend(["-i", background_audio_path])
+            cmd.extend([
+                "-filter_complex", filter_complex,
+                "-map", final_map,
+                *mix_audio_codec_args(),
+                output_path
+            ])
+            subprocess.run(cmd, check=True, stdin=DEVNULL, stdout=DEVNULL, stderr=PIPE)
         
         if os.path.exists(output_path):
             file_size = os.path.getsize(output_path)
@@ -189,5 +166,5 @@ def create_enhanced_audio_track_with_loose_sync(segments: List[DubSegment], outp
     except subprocess.CalledProcessError as e:
         print(f"❌ Enhanced audio creation failed: {e}")
         if e.stderr:
-            print(f"   stderr: {e.stderr}")
+            print(f"   stderr: {stderr_tail(e)}")
         return False
\ No newline at end of file
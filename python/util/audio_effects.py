@@ -3,8 +3,12 @@ Simple Audio Effects using Pedalboard
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
+# Seconds of audio per pedalboard call
+EFFECTS_BLOCK_SECONDS = 10
+
 def apply_audio_effects(input_path: str, output_path: str, preset: str = "voice") -> bool:
     """Apply audio effects to the final mixed audio"""
     
@@ -70,15 +74,21 @@ def apply_audio_effects(input_path: str, output_path: str, preset: str = "voice"
         # Apply effects using the example code pattern
         with AudioFile(input_path) as f:
             with AudioFile(output_path, 'w', f.samplerate, f.num_channels) as o:
-                # Read one second of audio at a time, until the file is empty:
-                while f.tell() < f.frames:
-                    chunk = f.read(f.samplerate)
-                    
-                    # Run the audio through our pedalboard:
-                    effected = board(chunk, f.samplerate, reset=False)
-                    
-                    # Write the output to our output file:
-                    o.write(effected)
+                block_size = int(f.samplerate * EFFECTS_BLOCK_SECONDS)
+                
+                # Decode the next block on a helper thread while the current one is processed;
+                # pedalboard releases the GIL, so decoding, effects and encoding overlap
+                with ThreadPoolExecutor(max_workers=1) as reader:
+                    pending = reader.submit(f.read, block_size) if f.tell() < f.frames else None
+                    while pending is not None:
+                        chunk = pending.result()
+                        pending = reader.submit(f.read, block_size) if f.tell() < f.frames else None
+                        
+                        # Run the audio through our pedalboard (reset=False keeps reverb/compressor state):
+                        effected = board(chunk, f.samplerate, reset=False)
+                        
+                        # Write the output to our output file:
+                        o.write(effected)
         
         print(f"✅ Effects applied: {output_path}")
         return True
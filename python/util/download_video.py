@@ -23,6 +23,7 @@ def download_video(youtube_url: str, video_id: str, output_dir: str = None):
     command = [
         "yt-dlp",
         "-f", "best[ext=mp4]/best[ext=webm]/best",  # Prefer video formats
+        "-N", "4",  # Concurrent fragment downloads
         "-o", output_path,
         youtube_url
     ]
@@ -58,12 +59,12 @@ def extract_audio_from_original_video(video_id, downloaded_video):
     # WhisperX audio: 16kHz, mono (for transcription)
     try:
         ffmpeg_cmd = [
-            "ffmpeg", "-y",
+            "ffmpeg", "-y", "-v", "error",
             "-i", downloaded_video,
             "-vn", "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1",
             audio_path  # <-- This should go to audio folder, not videos folder
         ]
-        subprocess.run(ffmpeg_cmd, check=True, capture_output=True)
+        subprocess.run(ffmpeg_cmd, check=True, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
         print(f"✅ Audio extracted to: {audio_path}")
 
         return audio_path
@@ -0,0 +1,35 @@
+import functools
+from typing import Optional
+
+_YOUTUBE_HOSTS = ("www.youtube.com", "youtube.com")
+
+def _is_video_id(value: str) -> bool:
+    """A bare YouTube ID: 11 chars of letters, digits, '_' or '-'"""
+    return len(value) == 11 and value.replace("-", "").replace("_", "").isalnum()
+
+@functools.lru_cache(maxsize=256)
+def extract_video_id(url_or_id: str) -> Optional[str]:
+    """Extract YouTube video ID from URL or return ID if already provided"""
+    if _is_video_id(url_or_id):
+        return url_or_id
+
+    # Split the URL with plain string operations: [scheme://][user@]host[:port]/path?query#fragment
+    _, sep, rest = url_or_id.partition("://")
+    if not sep:
+        rest = url_or_id
+    host, _, path = rest.partition("/")
+    host = host.rpartition("@")[2].partition(":")[0].lower()
+    path, _, query = path.partition("#")[0].partition("?")
+
+    if host in _YOUTUBE_HOSTS:
+        for param in query.split("&"):
+            if param.startswith("v="):
+                return param[2:] or None
+        for prefix in ("shorts/", "embed/"):
+            if path.startswith(prefix):
+                return path[len(prefix):].partition("/")[0] or None
+        return None
+    elif host == "youtu.be":
+        return path
+    else:
+        return None  # Invalid format
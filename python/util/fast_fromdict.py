@@ -0,0 +1,31 @@
+from dataclasses import MISSING, fields
+
+def fast_fromdict(cls):
+    """Class decorator adding a straight-line from_dict() classmethod, generated once from the dataclass fields.
+
+    Unlike cls(**data) it ignores extra keys. A missing required key raises TypeError, as the constructor would.
+    """
+    namespace = {}
+    required, optional = [], []
+    for f in fields(cls):
+        if f.default is not MISSING:
+            namespace[f"_default_{f.name}"] = f.default
+            optional.append(f"    self.{f.name} = data.get({f.name!r}, _default_{f.name})")
+        elif f.default_factory is not MISSING:
+            namespace[f"_factory_{f.name}"] = f.default_factory
+            optional.append(f"    self.{f.name} = data[{f.name!r}] if {f.name!r} in data else _factory_{f.name}()")
+        else:
+            required.append(f"        self.{f.name} = data[{f.name!r}]")
+
+    lines = ["def from_dict(cls, data):", "    self = cls.__new__(cls)"]
+    if required:
+        lines += ["    try:", *required, "    except KeyError as e:",
+                  f"        raise TypeError(f\"{cls.__name__}.from_dict() missing required key {{e}}\") from None"]
+    lines += optional + ["    return self"]
+    exec("\n".join(lines) + "\n", namespace)
+
+    from_dict = namespace["from_dict"]
+    from_dict.__qualname__ = f"{cls.__qualname__}.from_dict"
+    from_dict.__doc__ = f"Build a {cls.__name__} from a dict of its fields (generated by fast_fromdict)"
+    cls.from_dict = classmethod(from_dict)
+    return cls
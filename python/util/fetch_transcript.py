@@ -1,4 +1,4 @@
-import json
+from util.json_io import load_json
 import os
 from pathlib import Path
 import subprocess
@@ -32,9 +32,9 @@ def fetch_transcript(video_id: str, output_dir: str, mode: str = "prompt"):
         os.makedirs(output_dir, exist_ok=True)
         suffix = "human" if not transcript.is_generated else "generated"
         out_path = os.path.join(output_dir, f"{video_id}_{suffix}.json")
-        with open(out_path, "w", encoding="utf-8") as f:
-            json_str = JSONFormatter().format_transcript(data, indent=2)
-            f.write(json_str)
+        json_str = JSONFormatter().format_transcript(data, indent=2)
+        with open(out_path, "wb") as f:
+            f.write(json_str.encode("utf-8"))
         print(f"✅ Transcript saved to {out_path}")
         return data
     except Exception as e:
@@ -69,8 +69,7 @@ def fetch_transcript(video_id: str, output_dir: str, mode: str = "prompt"):
             subprocess.run(command, check=True)
             print(f"✅ WhisperX transcription complete. Output saved to {output_dir}")
             json_path = os.path.join(output_dir, f"{Path(audio_file).stem}.json")
-            with open(json_path, "r", encoding="utf-8") as f:
-                result = json.load(f)
+            result = load_json(json_path)
             return result.get("segments", [])
         except subprocess.CalledProcessError as err:
             print(f"❌ WhisperX failed: {err}")
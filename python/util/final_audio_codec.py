@@ -0,0 +1,59 @@
+"""
+Encoder settings for the final dubbed audio track
+"""
+
+import os
+import subprocess
+from subprocess import DEVNULL, PIPE
+from typing import List
+
+# codec -> (file extension, ffmpeg encoder, bitrate or None to use audio_quality)
+_FINAL_AUDIO_CODECS = {
+    "mp3": ("mp3", "libmp3lame", None),
+    "aac": ("m4a", "aac", None),
+    "opus": ("opus", "libopus", "96k"),  # Opus at 96k matches mp3 at 128k
+}
+
+def _final_codec() -> str:
+    from config import config
+
+    codec = config.get("final_audio_codec", "mp3")
+    if codec not in _FINAL_AUDIO_CODECS:
+        print(f"⚠️ Unknown final_audio_codec '{codec}', using mp3")
+        return "mp3"
+    return codec
+
+def final_audio_extension() -> str:
+    """File extension for the final audio track, without the dot"""
+    return _FINAL_AUDIO_CODECS[_final_codec()][0]
+
+def final_audio_codec_args() -> List[str]:
+    """ffmpeg output arguments for encoding the final audio track"""
+    from config import config
+
+    _, encoder, bitrate = _FINAL_AUDIO_CODECS[_final_codec()]
+    return ["-c:a", encoder, "-b:a", bitrate or config.get("audio_quality", "128k"), "-threads", "0"]
+
+def mix_audio_extension() -> str:
+    """File extension for the mixed track before its final encode, without the dot.
+
+    With mp3 the mix is the final track. Other codecs mix to WAV, which pedalboard effects
+    can write, so the final encode is the only lossy one.
+    """
+    return "mp3" if _final_codec() == "mp3" else "wav"
+
+def mix_audio_codec_args() -> List[str]:
+    """ffmpeg output arguments for the mixed track (see mix_audio_extension)"""
+    return final_audio_codec_args() if _final_codec() == "mp3" else ["-c:a", "pcm_s16le"]
+
+def encode_final_audio(audio_path: str) -> str:
+    """Encode a mixed, effects or concatenated track to the final codec, returning the final track's path"""
+    final_path = f"{os.path.splitext(audio_path)[0]}.{final_audio_extension()}"
+    if final_path == audio_path:
+        return audio_path
+    
+    subprocess.run(
+        ["ffmpeg", "-y", "-v", "error", "-i", audio_path, "-vn", *final_audio_codec_args(), final_path],
+        check=True, stdin=DEVNULL, stdout=DEVNULL, stderr=PIPE
+    )
+    return final_path
@@ -0,0 +1,36 @@
+"""
+JSON file helpers that use orjson when it is installed
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def loads_json(data):
+    """Parse JSON bytes or text, using orjson's C parser when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps_json(data, indent: bool = True) -> bytes:
+    """Serialize data to UTF-8 JSON bytes, indented unless indent is False, using orjson when available"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(data, option=option)
+    if indent:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def load_json(path):
+    """Read and parse a JSON file"""
+    with open(path, "rb") as f:
+        return loads_json(f.read())
+
+def dump_json(path, data):
+    """Write data to a file as indented UTF-8 JSON"""
+    payload = dumps_json(data)
+    with open(path, "wb") as f:
+        f.write(payload)
@@ -0,0 +1,27 @@
+import os
+import shutil
+import subprocess
+
+def link_or_copy(src: str, dst: str) -> str:
+    """Place src at dst as a hard link, else a reflink, else a full copy, returning which was used.
+
+    Deleting either path leaves the other intact. A hard link shares its data with src,
+    so only use this for files that are not rewritten in place afterwards.
+    """
+    # os.link refuses to replace an existing file, and cp would see the same inode
+    if os.path.lexists(dst):
+        os.remove(dst)
+    
+    try:
+        os.link(src, dst)
+        return "hard link"
+    except OSError:
+        pass
+    
+    # Different filesystem: let cp share extents on btrfs/XFS, or copy on anything else
+    try:
+        subprocess.run(["cp", "--reflink=auto", src, dst], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return "reflink/copy"
+    except (OSError, subprocess.CalledProcessError):
+        shutil.copy2(src, dst)
+        return "copy"
@@ -5,6 +5,8 @@ def merge_audio_with_video(video_path: str, audio_path: str, output_path: str):
     """
     Replaces the audio track of the video with the new dubbed audio.
     """
+    # An AAC track (final_audio_codec "aac") goes into the MP4 as-is; others are encoded to AAC
+    audio_codec = "copy" if audio_path.lower().endswith((".m4a", ".aac")) else "aac"
     try:
         subprocess.run([
             "ffmpeg",
@@ -12,6 +14,7 @@ def merge_audio_with_video(video_path: str, audio_path: str, output_path: str):
             "-i", video_path,
             "-i", audio_path,
             "-c:v", "copy",         # copy the video stream
+            "-c:a", audio_codec,
             "-map", "0:v:0",        # take the video from input 0
             "-map", "1:a:0",        # take the audio from input 1
             "-shortest",            # cut to shortest of audio/video
@@ -0,0 +1,22 @@
+import subprocess
+
+def probe_duration(path: str) -> float:
+    """Media duration in seconds, read from the container header (PyAV) or via ffprobe"""
+    try:
+        import av
+    except ImportError:
+        av = None
+
+    if av is not None:
+        try:
+            with av.open(path) as container:
+                if container.duration is not None:
+                    return container.duration / av.time_base
+        except Exception:
+            pass  # Let ffprobe have a go
+    
+    result = subprocess.run([
+        "ffprobe", "-v", "quiet", "-show_entries", "format=duration",
+        "-of", "csv=p=0", path
+    ], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip())
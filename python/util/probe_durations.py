@@ -0,0 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from util.probe_duration import probe_duration
+
+def probe_durations(paths: List[str], max_workers: int = 8) -> List[Optional[float]]:
+    """Durations of many media files, probed concurrently; None for any file that can't be probed"""
+    def probe(path: str) -> Optional[float]:
+        try:
+            return probe_duration(path)
+        except Exception:
+            return None
+    
+    # Each probe is a header read or an ffprobe process, so threads overlap the waits
+    if len(paths) <= 1:
+        return [probe(path) for path in paths]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+        return list(executor.map(probe, paths))
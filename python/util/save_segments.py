@@ -0,0 +1,22 @@
+from pathlib import Path
+from typing import List
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from structs.DubSegment import DubSegment
+from util.json_io import dump_json
+
+def save_segments(segment_data_path, segments: List[DubSegment]):
+    """Write the segments file plus .count (and, with msgpack installed, .msgpack) sidecars"""
+    segment_data_path = Path(segment_data_path)
+    segment_data = [seg.to_dict() for seg in segments]
+    dump_json(segment_data_path, segment_data)
+    
+    # Sidecars are written after the JSON so their mtime marks them as current;
+    # loaders ignore any sidecar older than a (hand-edited) JSON file
+    if msgpack is not None:
+        segment_data_path.with_suffix(".msgpack").write_bytes(msgpack.packb(segment_data))
+    segment_data_path.with_suffix(".count").write_text(f"{len(segments)}\n")
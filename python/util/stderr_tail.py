@@ -0,0 +1,8 @@
+import subprocess
+
+def stderr_tail(error: subprocess.CalledProcessError, limit: int = 4096) -> str:
+    """Return the last `limit` characters of a failed process's captured stderr"""
+    stderr = error.stderr or b""
+    if isinstance(stderr, bytes):
+        stderr = stderr[-limit:].decode("utf-8", errors="replace")
+    return stderr[-limit:].strip()
@@ -1,6 +1,16 @@
+import threading
 import requests
 from typing import Optional
 
+# One keep-alive session per synthesis thread, so the Kokoro connection is reused across segments
+_local = threading.local()
+
+def _session() -> requests.Session:
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
 def synthesize_kokoro_snippet(text: str, out_path: str, voice: str = "ef_dora", speed: float = 1.0, endpoint: str = "http://localhost:8880") -> Optional[str]:
     try:
         payload = {
@@ -13,7 +23,7 @@ def synthesize_kokoro_snippet(text: str, out_path: str, voice: str = "ef_dora",
 
         print(f"🎤 Synthesizing: '{text[:50]}...'")
 
-        response = requests.post(
+        response = _session().post(
             f"{endpoint}/v1/audio/speech",
             headers={
                 "Content-Type": "application/json",
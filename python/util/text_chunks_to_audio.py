@@ -1,40 +1,100 @@
 import os
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from util.synthesize_kokoro_snippet import synthesize_kokoro_snippet
+from util.link_or_copy import link_or_copy
+from util.probe_duration import probe_duration
 
 from speakers import speaker_voices
 
+def _tts_cache_key(text, voice, speed, config):
+    """Content hash of everything that affects the synthesized audio"""
+    return hashlib.sha1(f"{voice}|{config['target_language']}|{speed}|{text}".encode("utf-8")).hexdigest()
+
+def _is_cached_copy(path, cache_path):
+    """True if path is already a hard link to (or a copy2 of) the cache entry"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    cache_st = os.stat(cache_path)
+    if (st.st_dev, st.st_ino) == (cache_st.st_dev, cache_st.st_ino):
+        return True
+    # copy2 keeps the mtime, so a fallback copy matches on size and mtime
+    return (st.st_size, st.st_mtime_ns) == (cache_st.st_size, cache_st.st_mtime_ns)
+
+def _record_duration(segment, path):
+    """Store the audio length on the segment, so syncing never has to probe the file again"""
+    try:
+        segment.audio_duration = probe_duration(path)
+    except Exception:
+        segment.audio_duration = None
+
+def _synthesize_segment(idx, segment, audio_dir, config):
+    """Synthesize one segment, reusing cached audio for identical text and voice"""
+    print(f"🔍 DEBUG: Processing segment {idx}: '{segment.original_text[:30]}...'")
+    text = segment.translated_text or segment.original_text
+    mp3_filename = f"chunk_{idx:03d}.mp3"
+    mp3_path = os.path.join(audio_dir, mp3_filename)
+
+    # Use adjusted speed if specified by rules
+    synthesis_speed = segment.adjusted_speed * config["kokoro_speed"]
+    voice = speaker_voices.get(segment.speaker, config["kokoro_default_voice"])
+
+    # Audio is cached by content, so only segments whose text (or voice) changed are re-synthesized
+    cache_dir = os.path.join(audio_dir, "tts_cache")
+    cache_path = os.path.join(cache_dir, f"{_tts_cache_key(text, voice, synthesis_speed, config)}.mp3")
+    if os.path.exists(cache_path):
+        # An unchanged segment already points at its cache entry, so there is nothing to relink
+        if not _is_cached_copy(mp3_path, cache_path):
+            print(f"✅ Reusing cached audio for {mp3_filename}")
+            link_or_copy(cache_path, mp3_path)
+            _record_duration(segment, mp3_path)
+        elif segment.audio_duration is None:
+            _record_duration(segment, mp3_path)
+        return mp3_path
+
+    # Write to a temp file and rename, so a failed request never leaves a partial cache entry
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    os.close(fd)
+    try:
+        result_path = synthesize_kokoro_snippet(
+            text, 
+            out_path=tmp_path, 
+            voice=voice,
+            speed=synthesis_speed, 
+            endpoint=config["kokoro_endpoint"]
+        )
+        if not result_path:
+            print(f"⚠️ Failed to synthesize segment {idx}")
+            return None
+        os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    link_or_copy(cache_path, mp3_path)
+    _record_duration(segment, mp3_path)
+    print(f"Created segment with speaker '{segment.speaker}' and result_path: '{mp3_path}' ")
+    return mp3_path
+
 def text_chunks_to_audio(segments, audio_dir, audio_paths):
     from config import config
 
-    for idx, segment in enumerate(segments):
-        print(f"🔍 DEBUG: Processing segment {idx}: '{segment.original_text[:30]}...'")
-        text = segment.translated_text or segment.original_text
-        mp3_filename = f"chunk_{idx:03d}.mp3"
-        mp3_path = os.path.join(audio_dir, mp3_filename)
-
-        # Check if this specific audio file already exists
-        if os.path.exists(mp3_path):
-            print(f"✅ Reusing existing audio: {mp3_filename}")
-            audio_paths.append(mp3_path)
-            segment.audio_file = mp3_path  # Use the actual path
-        else:
-            # Use adjusted speed if specified by rules
-            synthesis_speed = segment.adjusted_speed * config["kokoro_speed"]
-            result_path = synthesize_kokoro_snippet(
-                text, 
-                out_path=mp3_path, 
-                voice = speaker_voices.get(segment.speaker, config["kokoro_default_voice"]),
-                speed=synthesis_speed, 
-                endpoint=config["kokoro_endpoint"]
-            )
-            if result_path:
-                audio_paths.append(result_path)
-                segment.audio_file = result_path  # Use the actual returned path
-                print(f"Created segment with speaker '{segment.speaker}' and result_path: '{result_path}' ")
-            else:
-                print(f"⚠️ Failed to synthesize segment {idx}")
-                segment.audio_file = None
+    # Kokoro runs as an HTTP server, so threads are enough to keep several requests in flight
+    max_workers = max(1, min(config.get("tts_workers", 4), len(segments)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(
+            lambda item: _synthesize_segment(item[0], item[1], audio_dir, config),
+            enumerate(segments)
+        ))
 
+    for idx, (segment, result_path) in enumerate(zip(segments, results)):
+        segment.audio_file = result_path
+        if result_path:
+            audio_paths.append(result_path)
         print(f"🔍 DEBUG: Set segment {idx} audio_file to: {segment.audio_file}")
 
-    print(f"✅ Audio synthesis complete: {len(audio_paths)} chunks ready")
\ No newline at end of file
+    print(f"✅ Audio synthesis complete: {len(audio_paths)} chunks ready")
@@ -4,7 +4,7 @@ from checks.check_files_exist import check_transcript_exists
 import os, subprocess
 from typing import List, Dict, Optional
 from pathlib import Path
-import json
+from util.json_io import load_json
 
 def transcribe_with_whisperx(video_id: str, output_dir: str, mode: str = "whisperx") -> Optional[List[Dict]]:
     from config import config
@@ -102,8 +102,7 @@ def transcribe_with_whisperx(video_id: str, output_dir: str, mode: str = "whispe
         subprocess.run(command, check=True)
         print(f"✅ WhisperX transcription complete. Output saved to {output_dir}")
         json_path = os.path.join(output_dir, f"{Path(audio_file).stem}.json")
-        with open(json_path, "r", encoding="utf-8") as f:
-            result = json.load(f)
+        result = load_json(json_path)
         
         segments = result.get("segments", [])
         
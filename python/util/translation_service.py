@@ -3,7 +3,9 @@ Simplified Translation Service using Claude API
 """
 
 import json
+import copy
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 
@@ -33,6 +35,7 @@ class TranslationService:
         self.target_language = self.config.get("target_language", "es")
         self.batch_size = self.config.get("translation_batch_size", 8)  # Process 8 segments at once
         self.context_size = self.config.get("translation_context_size", 3)  # Include 3 previous segments
+        self.workers = self.config.get("translation_workers", 1)  # Batches in flight at once
         
         if not self.claude_api_key:
             raise ValueError("Claude API key not found. Set ANTHROPIC_API_KEY environment variable or add to config.")
@@ -82,8 +85,8 @@ IMPORTANT GUIDELINES:
         if context_segments:
             prompt += f"\n\nPREVIOUS CONTEXT:"
             for i, seg in enumerate(context_segments):
+                prompt += f"\n[{self._format_timestamp(seg.start)}] English: \"{seg.original_text}\""
                 if seg.translated_text:
-                    prompt += f"\n[{self._format_timestamp(seg.start)}] English: \"{seg.original_text}\""
                     prompt += f"\n[{self._format_timestamp(seg.start)}] {target_lang_name}: \"{seg.translated_text}\""
 
         # Add current segments to translate
@@ -161,27 +164,37 @@ etc."""
         print(f"🌐 Translating {len(segments)} segments to {self._get_language_name(self.target_language)} using Claude API...")
         
         translated_count = 0
+        batch_starts = range(0, len(segments), self.batch_size)
         
-        # Process in batches
-        for i in range(0, len(segments), self.batch_size):
+        def translate_batch(i: int, context_segments: Optional[List[DubSegment]]) -> List[str]:
             batch_end = min(i + self.batch_size, len(segments))
-            current_batch = segments[i:batch_end]
-            
-            # Get context from previous segments
-            context_start = max(0, i - self.context_size)
-            context_segments = segments[context_start:i] if i > 0 else None
-            
             print(f"   Processing batch {i//self.batch_size + 1}: segments {i+1}-{batch_end}")
-            
-            # Translate the batch
-            translations = self._translate_batch_with_claude(current_batch, context_segments)
-            
-            # Apply translations to segments
+            return self._translate_batch_with_claude(segments[i:batch_end], context_segments)
+        
+        def apply_translations(i: int, translations: List[str]):
+            nonlocal translated_count
             for j, translation in enumerate(translations):
                 if i + j < len(segments):
                     segments[i + j].translated_text = translation
                     translated_count += 1
         
+        if self.workers > 1 and len(batch_starts) > 1:
+            # Requests are network-bound, so overlap them; each batch sees its context as it was
+            # before translation started (English only) instead of the previous batch's output
+            contexts = [
+                [copy.copy(seg) for seg in segments[max(0, i - self.context_size):i]] or None
+                for i in batch_starts
+            ]
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for i, translations in zip(batch_starts, executor.map(translate_batch, batch_starts, contexts)):
+                    apply_translations(i, translations)
+        else:
+            # Process in batches, giving each one the previous segments' translations as context
+            for i in batch_starts:
+                context_start = max(0, i - self.context_size)
+                context_segments = segments[context_start:i] if i > 0 else None
+                apply_translations(i, translate_batch(i, context_segments))
+        
         print(f"✅ Translation completed: {translated_count}/{len(segments)} segments translated")
         return segments
     
@@ -0,0 +1,14 @@
+import os
+
+def write_atomic(path, payload: bytes):
+    """Write bytes to a temp file, fsync it, and rename it over path so readers never see a partial file"""
+    tmp_path = f"{path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, path)